@@ -0,0 +1,237 @@
+"""Time and memory of every pipeline stage on synthetic logs, saved as JSON.
+
+    python benchmarks/pipeline_bench.py [--sizes 10k,1m,10m] [--repeat 3] [-o results.json]
+    python benchmarks/pipeline_bench.py --compare old.json new.json
+
+For every size, synthetic `.vlog` files (see `loganalyzer.synth`) are
+written to a temporary folder and every stage is run `--repeat` times:
+
+    parse        parse_log_file on every file, in-process
+    build_sort   concatenate, compact and sort the parsed frames
+    ingest       the whole parallel ingest() the dashboard runs
+    categorize   add the Category column
+    detect       detect_anomalies with all rules
+    export_csv   report ZIP with the CSV timeline and anomaly report
+    to_parquet   timeline as Parquet bytes
+
+Each stage records its fastest and median wall time and the peak resident
+memory above the level it started at. The output file also holds the
+commit, library versions and machine, so runs of two commits can be put
+side by side with `--compare`.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from loganalyzer.categorize import categorize
+from loganalyzer.export import report_zip
+from loganalyzer.ingest import ingest
+from loganalyzer.parser import parse_log_file
+from loganalyzer.profiling import PeakRSS
+from loganalyzer.rules import detect_anomalies
+from loganalyzer.storage import to_bytes
+from loganalyzer.synth import parse_mix, write_logs
+from loganalyzer.timeline import compact
+
+try:
+    import psutil
+except ImportError:  # peak memory falls back to tracemalloc
+    psutil = None
+
+RESULTS_VERSION = 1
+DEFAULT_SIZES = "10k,1m,10m"
+_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_size(text):
+    """`"10k"` -> 10000, `"1m"` -> 1000000."""
+    text = text.strip().lower()
+    if text[-1:] in _SUFFIXES:
+        return int(float(text[:-1]) * _SUFFIXES[text[-1]])
+    return int(text)
+
+
+# ----- Measuring -----
+def measure(fn):
+    """Run `fn()` once; returns `(result, seconds, peak bytes above the starting level)`.
+
+    Without psutil the peak comes from tracemalloc, which only sees Python
+    and NumPy allocations (not Arrow's) and slows the run down.
+    """
+    if psutil is not None:
+        with PeakRSS() as rss:
+            started = time.perf_counter()
+            result = fn()
+            seconds = time.perf_counter() - started
+        return result, seconds, rss.peak_delta
+    import tracemalloc
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+# ----- Stages -----
+def _parse(paths):
+    frames = []
+    for path in paths:
+        with open(path, "rb") as f:
+            frames.append(parse_log_file(f, os.path.basename(path))[0])
+    return frames
+
+
+def _build_sort(frames):
+    return compact(pd.concat(frames, ignore_index=True)).sort_values("Timestamp", kind="stable")
+
+
+def _export_csv(df, anomalies, summary_stats):
+    spool = report_zip(df, anomalies, summary_stats)
+    spool.seek(0, os.SEEK_END)
+    size = spool.tell()
+    spool.close()
+    return size
+
+
+def run_size(lines, args):
+    """Generate `lines` lines and time every stage on them."""
+    stages = {}
+
+    def stage(name, fn):
+        times, peaks = [], []
+        for _ in range(args.repeat):
+            result, seconds, peak = measure(fn)
+            times.append(seconds)
+            peaks.append(peak)
+        stages[name] = {
+            "best_s": round(min(times), 6), "median_s": round(statistics.median(times), 6),
+            "peak_rss_bytes": max(peaks), "lines_per_s": round(lines / min(times)) if min(times) else None,
+        }
+        print(f"  {name:<12} {min(times):>9.3f} s  {max(peaks) / (1 << 20):>9.1f} MB", flush=True)
+        return result
+
+    with tempfile.TemporaryDirectory(prefix="vlog-bench-", dir=args.data_dir) as data_dir:
+        started = time.perf_counter()
+        paths = write_logs(data_dir, lines, files=args.files, users=args.users, ips=args.ips,
+                           corrupt_rate=args.corrupt_rate, event_mix=args.mix, seed=args.seed)
+        generate_s = time.perf_counter() - started
+        size = sum(os.path.getsize(path) for path in paths)
+        print(f"{lines:,} lines, {size / (1 << 20):.1f} MB in {len(paths)} file(s)", flush=True)
+
+        frames = stage("parse", lambda: _parse(paths))
+        stage("build_sort", lambda: _build_sort(frames))
+        del frames
+        df, summary_stats, error_lines = stage("ingest", lambda: ingest(paths, workers=args.workers))
+        df = stage("categorize", lambda: categorize(df))
+        anomalies = stage("detect", lambda: detect_anomalies(df))
+        stage("export_csv", lambda: _export_csv(df, anomalies, summary_stats))
+        stage("to_parquet", lambda: len(to_bytes(df, "Parquet")))
+
+    return {
+        "lines": lines, "bytes": size, "files": len(paths), "generate_s": round(generate_s, 3),
+        "events": len(df), "malformed": error_lines.total, "anomalies": len(anomalies), "stages": stages,
+    }
+
+
+# ----- Results -----
+def _git_commit():
+    root = Path(__file__).resolve().parents[1]
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root,
+                               capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return out.stdout.strip(), bool(dirty.stdout.strip())
+
+
+def environment():
+    try:
+        import pyarrow
+        pyarrow_version = pyarrow.__version__
+    except ImportError:
+        pyarrow_version = None
+    commit, dirty = _git_commit()
+    return {
+        "commit": commit, "dirty": dirty, "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+        "pyarrow": pyarrow_version, "platform": platform.platform(), "cpus": os.cpu_count(),
+    }
+
+
+def compare(old_path, new_path):
+    """Print the best time and peak memory of every stage of two result files side by side."""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    rows = []
+    for size, run in new["runs"].items():
+        before = old["runs"].get(size)
+        if before is None:
+            continue
+        for name, stage in run["stages"].items():
+            if name in before["stages"]:
+                was = before["stages"][name]
+                rows.append({
+                    "lines": size, "stage": name, "old_s": was["best_s"], "new_s": stage["best_s"],
+                    "speedup": was["best_s"] / stage["best_s"] if stage["best_s"] else None,
+                    "old_MB": was["peak_rss_bytes"] / (1 << 20), "new_MB": stage["peak_rss_bytes"] / (1 << 20),
+                })
+    print(f"{old['environment']['commit'] or old_path}  ->  {new['environment']['commit'] or new_path}")
+    print(pd.DataFrame(rows).round(3).to_string(index=False) if rows else "No sizes in common.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="line counts, e.g. 10k,1m,10m")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--ips", type=int, default=5000)
+    parser.add_argument("--corrupt-rate", type=float, default=0.001)
+    parser.add_argument("--mix", type=parse_mix, help="event weights, e.g. EXEC=2,FILE=2,CONN=1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="ingest processes (default: all cores)")
+    parser.add_argument("--data-dir", help="where to put the generated logs (default: system temp)")
+    parser.add_argument("-o", "--output", default="benchmark_results.json")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = {
+        "version": RESULTS_VERSION,
+        "environment": environment(),
+        "parameters": {
+            "repeat": args.repeat, "files": args.files, "users": args.users, "ips": args.ips,
+            "corrupt_rate": args.corrupt_rate, "mix": args.mix, "seed": args.seed, "workers": args.workers,
+            "memory": "rss" if psutil is not None else "tracemalloc",
+        },
+        "runs": {},
+    }
+    for size in args.sizes.split(","):
+        lines = parse_size(size)
+        results["runs"][str(lines)] = run_size(lines, args)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
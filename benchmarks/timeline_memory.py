@@ -0,0 +1,63 @@
+"""Memory of a parsed timeline: list of dicts vs. DataFrame vs. compact timeline.
+
+    python benchmarks/timeline_memory.py [--repeat N] [file.vlog ...]
+
+Without files the sample logs are used, repeated `--repeat` times.
+"""
+import argparse
+import glob
+import io
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from loganalyzer.parser import parse_log_file, parse_log_lines
+from loganalyzer.timeline import compact
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parents[1]
+    files = args.files or sorted(glob.glob(str(root / "sample log" / "*.vlog")))
+    lines = []
+    for path in files:
+        with open(path, encoding="utf-8") as f:
+            lines.extend(f.read().splitlines())
+    if not args.files:
+        lines *= args.repeat
+    data = ("\n".join(lines) + "\n").encode("utf-8")
+
+    # list of dicts, as the pages used to build it
+    tracemalloc.start()
+    entries, _ = parse_log_lines(lines, "bench.vlog")
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del entries
+
+    df, _ = parse_log_file(io.BytesIO(data), "bench.vlog")
+    frame_bytes = int(df.memory_usage(deep=True).sum())
+    compact_df = compact(df)
+    compact_bytes = int(compact_df.memory_usage(deep=True).sum())
+
+    mb = 1 << 20
+    print(f"rows                 {len(df):>12,}")
+    print(f"list of dicts        {dict_bytes / mb:>10.1f} MB")
+    print(f"parsed DataFrame     {frame_bytes / mb:>10.1f} MB")
+    print(f"compact timeline     {compact_bytes / mb:>10.1f} MB  ({frame_bytes / compact_bytes:.1f}x smaller)")
+    print()
+    print(pd.DataFrame({
+        "parsed": df.memory_usage(deep=True, index=False) / mb,
+        "compact": compact_df.memory_usage(deep=True, index=False) / mb,
+        "dtype": compact_df.dtypes.astype(str),
+    }).round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
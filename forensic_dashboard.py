@@ -1,11 +1,19 @@
 import streamlit as st
 import pandas as pd
-import re
 from collections import defaultdict
-import io
-import zipfile
 import plotly.express as px
-import plotly.io as pio
+
+from loganalyzer.aggregate import TimelineAggregates
+from loganalyzer.cache import ParseCache
+from loganalyzer.export import TABLE_FORMATS, report_zip
+from loganalyzer.follow import LogFollower
+from loganalyzer.geoip import LAYOUTS, ip_locations, load_ip_database
+from loganalyzer.plotexport import PLOT_FORMATS, PlotExporter
+from loganalyzer.ingest import ingest
+from loganalyzer.profiling import CAPTURE_KINDS, Profiler, enable_logging
+from loganalyzer.rules import SHORT_DESCRIPTIONS
+from loganalyzer.scoring import AnomalyScorer
+from loganalyzer.timeline import expand
 
 # Streamlit config
 st.set_page_config(page_title="Forensic Artifact Analyzer", layout="wide")
@@ -13,63 +21,115 @@ st.title("🧰 Forensic Artifact Parser & Visual Dashboard")
 
 uploaded_files = st.file_uploader("📂 Upload one or more `.vlog` log files", type=["vlog"], accept_multiple_files=True)
 
-parsed_logs = []
 summary_stats = defaultdict(int)
 df_logs = pd.DataFrame()
 df_anomalies = pd.DataFrame()
 
-# Anomaly rules
-def detect_anomalies(df):
-    results = []
-    df = df.sort_values("Timestamp")
-    for user in df["user"].dropna().unique():
-        user_df = df[df["user"] == user]
-        for i in range(len(user_df) - 1):
-            curr = user_df.iloc[i]
-            nxt = user_df.iloc[i + 1]
-            if curr["ShortType"] == "EXEC" and nxt["ShortType"] == "FILE" and "passwd" in str(nxt.get("path", "")):
-                results.append({"Rule": "R1", "User": user, "Description": "Exec then passwd mod", "Time": nxt["Timestamp"]})
-            if curr["ShortType"] == "EXEC" and nxt["ShortType"] == "SHDW":
-                results.append({"Rule": "R2", "User": user, "Description": "Exec then kill", "Time": nxt["Timestamp"]})
-            if curr["ShortType"] == "FILE" and nxt["ShortType"] == "DEL" and curr.get("path") == nxt.get("path"):
-                results.append({"Rule": "R5", "User": user, "Description": "Mod then del same file", "Time": nxt["Timestamp"]})
-    for _, row in df[df["ShortType"] == "DEL"].iterrows():
-        if any(s in row.get("path", "") for s in ["/etc/passwd", "/opt/secure.shd"]):
-            results.append({"Rule": "R4", "User": row["user"], "Description": f"Deleted sensitive file: {row['path']}", "Time": row["Timestamp"]})
-    return pd.DataFrame(results)
-
 # File processing
-if uploaded_files:
-    for uploaded in uploaded_files:
-        content = uploaded.read().decode("utf-8").splitlines()
-        for line in content:
-            m = re.match(r"(0x[0-9A-F]+)\[ts:(\d+)\]\|EVNT:(\S+)!@(.+)", line)
-            if not m:
-                continue
-            idx, ts, etype, payload = m.groups()
-            short = etype.split("-")[-1]
-            log_entry = {
-                "File": uploaded.name,
-                "Index": idx,
-                "Timestamp": int(ts),
-                "Event": etype,
-                "ShortType": short,
-                "Payload": payload
-            }
-            if "usr:" in payload:
-                log_entry["user"] = payload.split("usr:")[1].split("=>")[0]
-            if "=>" in payload:
-                log_entry["path"] = payload.split("=>")[1]
-            if "IP:" in payload:
-                log_entry["ip"] = payload.split("IP:")[1]
-            if "pid" in payload:
-                log_entry["pid"] = payload.split("pid")[-1]
-            parsed_logs.append(log_entry)
-            summary_stats[short] += 1
-
-    df_logs = pd.DataFrame(parsed_logs).sort_values("Timestamp")
-    df_anomalies = detect_anomalies(df_logs)
+workers = st.sidebar.number_input("⚙️ Parser processes (0 = all cores)", min_value=0, value=0, step=1)
+cache_mb = st.sidebar.number_input("🗄️ Parse cache size (MB)", min_value=16, value=1024, step=64)
+spill_dir = st.sidebar.text_input("💾 Spill cache to directory (optional)")
+
+
+@st.cache_resource
+def get_parse_cache(max_mb, spill_to):
+    # one cache per budget/spill setting, shared by every rerun and session
+    return ParseCache(max_mb << 20, spill_to or None)
+
+
+@st.cache_resource
+def get_plot_exporter():
+    # rendered plot bytes, shared by every rerun and session
+    return PlotExporter()
+
+
+@st.cache_resource
+def get_anomaly_scorer():
+    # fitted once, then every upload is scored against the same baseline
+    return AnomalyScorer()
+
+
+@st.cache_resource
+def get_ip_database(path, layout):
+    # loaded and sorted once; its lookup cache lives as long as the database
+    return load_ip_database(path, layout=layout)
+
+
+def cached_figure(name, inputs, build):
+    # rebuilt only when its inputs change: frames and other objects by identity, plain values by equality
+    key = tuple(value if isinstance(value, (int, float, str)) else id(value) for value in inputs)
+    cached = st.session_state.get(f"figure_{name}")
+    if cached is None or cached[0] != key:
+        cached = (key, build(), inputs)   # holding on to the inputs keeps their ids from being reused
+        st.session_state[f"figure_{name}"] = cached
+    return cached[1]
+
+
+parse_cache = get_parse_cache(int(cache_mb), spill_dir)
+plot_exporter = get_plot_exporter()
+ip_db_path = st.sidebar.text_input("🌍 Local IP database (CSV, optional)")
+ip_database = None
+if ip_db_path:
+    ip_db_layout = st.sidebar.selectbox("🌍 IP database columns", ["header row"] + list(LAYOUTS))
+    try:
+        ip_database = get_ip_database(ip_db_path, None if ip_db_layout == "header row" else ip_db_layout)
+    except (OSError, ValueError) as e:
+        st.error(f"❌ Could not load the IP database: {e}")
+use_scoring = st.sidebar.checkbox("📈 Statistical scoring (z-score / Isolation Forest)")
+if use_scoring and st.sidebar.button("🔁 Refit scoring model"):
+    get_anomaly_scorer().reset()
+    st.session_state.pop("scored_for", None)
+
+# Performance: stage timings (also logged as JSON to the server's stderr) and an opt-in profile of one run
+show_performance = st.sidebar.checkbox("⏱️ Show performance panel")
+capture_kind = st.sidebar.selectbox("🧪 Profiler", CAPTURE_KINDS)
+profile_run = st.sidebar.button("🧪 Profile this run")
+profiler = Profiler(enabled=show_performance or profile_run)
+if profiler.enabled:
+    enable_logging()
+if profile_run:
+    profiler.start_capture(capture_kind)
 
+# Follow mode: only lines appended since the last rerun are parsed
+follow_dir = st.sidebar.text_input("📡 Follow a local `.vlog` directory (optional)")
+
+if follow_dir:
+    if st.session_state.get("follow_dir") != follow_dir:
+        st.session_state["follow_dir"] = follow_dir
+        st.session_state["follower"] = LogFollower(follow_dir, rules=("R1", "R2", "R4", "R5"),
+                                                   descriptions=SHORT_DESCRIPTIONS)
+    follower = st.session_state["follower"]
+    st.sidebar.button("🔄 Read new lines")
+    with profiler.stage("follow_poll") as stage:
+        new_rows, _ = follower.poll()
+        stage.rows_out = len(new_rows)
+    st.sidebar.caption(f"{len(new_rows)} new events, {len(follower.timeline)} in total")
+    df_logs = follower.timeline
+    summary_stats.update(follower.summary_stats)
+    df_anomalies = follower.anomalies
+elif uploaded_files:
+    # unchanged uploads come straight from the cache on every rerun
+    df_logs, parsed_stats, _ = ingest(uploaded_files, workers=workers or None, cache=parse_cache, profiler=profiler)
+    summary_stats.update(parsed_stats)
+    with profiler.stage("detect", rows_in=len(df_logs)) as stage:
+        df_anomalies = parse_cache.detect_anomalies(uploaded_files, df_logs, rules=("R1", "R2", "R4", "R5"),
+                                                    descriptions=SHORT_DESCRIPTIONS)
+        stage.rows_out = len(df_anomalies)
+
+if use_scoring and not df_logs.empty:
+    # scored again only when the timeline changes or the model is refitted
+    if st.session_state.get("scored_for") is not df_logs:
+        with profiler.stage("score", rows_in=len(df_logs)) as stage:
+            st.session_state["scored"] = get_anomaly_scorer().score(df_logs)
+            st.session_state["scored_for"] = df_logs
+            st.session_state.pop("with_scores_for", None)
+            stage.rows_out = len(st.session_state["scored"])
+    if st.session_state.get("with_scores_for") is not df_anomalies:
+        st.session_state["with_scores_for"] = df_anomalies
+        st.session_state["with_scores"] = pd.concat([df_anomalies, st.session_state["scored"]], ignore_index=True)
+    df_anomalies = st.session_state["with_scores"]
+
+if not df_logs.empty:
     st.success("✅ Logs parsed and analyzed.")
 
     # Summary
@@ -78,7 +138,7 @@ if uploaded_files:
             st.write(f"🔸 {k}: {v} events")
 
     if st.checkbox("📈 Show Timeline Table"):
-        st.dataframe(df_logs, use_container_width=True)
+        st.dataframe(expand(df_logs), use_container_width=True)
 
     st.subheader("🚨 Detected Anomalies")
     if not df_anomalies.empty:
@@ -86,51 +146,149 @@ if uploaded_files:
     else:
         st.info("No anomalies found.")
 
-    # Export
+    # Export (filled in below, once the plots exist)
     st.subheader("📤 Export Reports")
-    timeline_csv = df_logs.to_csv(index=False).encode("utf-8")
-    anomaly_csv = df_anomalies.to_csv(index=False).encode("utf-8")
-    summary_text = "\n".join([f"{k}: {v}" for k, v in summary_stats.items()])
-
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, "a") as zipf:
-        zipf.writestr("timeline.csv", timeline_csv)
-        zipf.writestr("anomaly_report.csv", anomaly_csv)
-        zipf.writestr("summary.txt", summary_text)
-    st.download_button("📦 Download All Reports (ZIP)", zip_buffer.getvalue(), "forensic_reports.zip", mime="application/zip")
+    export_area = st.container()
 
     # Day 7 Visuals
     st.header("📊 Day 7: Visual Analytics")
 
+    # charts are drawn from per-bucket counts and a bounded sample, not from every event
+    if st.session_state.get("aggregates_for") is not df_logs:
+        st.session_state["aggregates_for"] = df_logs
+        with profiler.stage("aggregate", rows_in=len(df_logs)):
+            st.session_state["aggregates"] = TimelineAggregates(df_logs)
+    aggregates = st.session_state["aggregates"]
+    t_min, t_max = aggregates.span
+    if t_min < t_max:
+        t_start, t_end = st.slider("🔍 Time range", t_min, t_max, (t_min, t_max))
+    else:
+        t_start, t_end = t_min, t_max
+
+    # figures are kept between reruns and only rebuilt when what they show changes
     st.subheader("📊 Event Frequency Over Time")
-    freq_fig = px.histogram(df_logs, x="Timestamp", color="ShortType", nbins=30,
-                            title="Event Frequency", labels={"Timestamp": "Time", "ShortType": "Type"})
-    st.plotly_chart(freq_fig, use_container_width=True)
+    with profiler.stage("frequency_chart") as stage:
+        def frequency_figure():
+            freq_counts, bucket = aggregates.counts("ShortType", t_start, t_end)
+            stage.rows_out = len(freq_counts)
+            fig = px.bar(freq_counts, x="Time", y="Count", color="ShortType",
+                         title=f"Event Frequency ({bucket}s buckets)", labels={"ShortType": "Type"})
+            fig.update_traces(width=bucket, offset=0)
+            fig.update_layout(bargap=0)
+            return fig
+
+        freq_fig = cached_figure("event_frequency", (aggregates, t_start, t_end), frequency_figure)
+        st.plotly_chart(freq_fig, use_container_width=True)
 
     st.subheader("👤 User Activity Timeline")
-    user_df = df_logs.dropna(subset=["user"])
-    user_fig = px.strip(user_df, x="Timestamp", y="user", color="ShortType",
-                        title="User Actions Over Time", stripmode="overlay")
-    st.plotly_chart(user_fig, use_container_width=True)
+    with profiler.stage("user_chart") as stage:
+        def user_figure():
+            user_df = aggregates.strip_sample(t_start, t_end)
+            stage.rows_out = len(user_df)
+            if user_df.empty:
+                return None
+            return px.strip(user_df, x="Timestamp", y="user", color="ShortType", hover_data=["Events"],
+                            title="User Actions Over Time", stripmode="overlay")
+
+        user_fig = cached_figure("user_activity", (aggregates, t_start, t_end), user_figure)
+        if user_fig is None:
+            st.info("No user events in this time range.")
+        else:
+            st.plotly_chart(user_fig, use_container_width=True)
+
+    geo_fig = None
+    if ip_database is not None:
+        st.subheader("🌍 IP Geo-location")
+        with profiler.stage("geoip", rows_in=len(df_logs)) as stage:
+            def geo_figure():
+                # one lookup per distinct address, then the map is drawn from per-location totals
+                locations = ip_locations(df_logs, ip_database)
+                stage.rows_out = len(locations)
+                unknown = locations.loc[locations["Country"].isna(), "Events"].sum() if "Country" in locations else 0
+                if {"Latitude", "Longitude"} <= set(locations.columns):
+                    fig = px.scatter_geo(locations.dropna(subset=["Latitude", "Longitude"]), lat="Latitude",
+                                         lon="Longitude", size="Events", hover_name="Country",
+                                         hover_data=[c for c in ("City", "IPs") if c in locations],
+                                         title="Connections by Location", projection="natural earth")
+                else:
+                    fig = px.bar(locations.dropna(subset=["Country"]), x="Country", y="Events",
+                                 hover_data=["IPs"], title="Connections by Country")
+                return fig, unknown
+
+            geo_fig, unknown = cached_figure("ip_locations", (df_logs, ip_database), geo_figure)
+            st.plotly_chart(geo_fig, use_container_width=True)
+        if unknown:
+            st.caption(f"{unknown} connection(s) to addresses not in the database.")
 
     if not df_anomalies.empty:
         st.subheader("🚨 Anomaly Highlights")
-        anomaly_fig = px.scatter(df_anomalies, x="Time", y="User", color="Rule",
-                                 hover_data=["Description"], title="Anomalies Detected")
-        st.plotly_chart(anomaly_fig, use_container_width=True)
+        with profiler.stage("anomaly_chart", rows_in=len(df_anomalies)):
+            anomaly_fig = cached_figure("anomaly_plot", (df_anomalies,), lambda: px.scatter(
+                df_anomalies, x="Time", y="User", color="Rule", hover_data=["Description"],
+                title="Anomalies Detected"))
+            st.plotly_chart(anomaly_fig, use_container_width=True)
+
+    figures = {"event_frequency": freq_fig}
+    if user_fig is not None:
+        figures["user_activity"] = user_fig
+    if not df_anomalies.empty:
+        figures["anomaly_plot"] = anomaly_fig
+    if geo_fig is not None:
+        figures["ip_locations"] = geo_fig
+
+    with export_area:
+        table_format = st.radio("Table format", list(TABLE_FORMATS), horizontal=True)
+        compress = st.checkbox("🗜️ Compress the ZIP (fast deflate)")
+        include_plots = st.checkbox("🖼️ Include plots in the ZIP (PNG + HTML)")
+        # built only when asked for; reruns reuse it until the data or the options change
+        if follow_dir:
+            data_key = ("follow", follow_dir, len(df_logs))
+        else:
+            data_key = tuple(parse_cache.source_key(file) for file in uploaded_files)
+        report_key = (data_key, len(df_anomalies), use_scoring, ip_db_path, table_format, compress, include_plots)
+        if st.button("📦 Prepare report ZIP"):
+            # tables are written chunk by chunk into a spooled temp file, plots are rendered concurrently
+            with profiler.stage("export_zip", rows_in=len(df_logs) + len(df_anomalies)):
+                with report_zip(df_logs, df_anomalies, summary_stats, table_format=table_format,
+                                compression="fast" if compress else "none",
+                                figures=figures if include_plots else None, plot_exporter=plot_exporter) as report:
+                    st.session_state["report"] = (report_key, report.read())
+        prepared = st.session_state.get("report")
+        if prepared is not None and prepared[0] == report_key:
+            st.download_button("📦 Download All Reports (ZIP)", prepared[1], "forensic_reports.zip", mime="application/zip")
+        elif prepared is not None:
+            st.caption("The data or the options changed since the ZIP was prepared.")
 
     # Export Plots
     st.subheader("📥 Download Plots")
 
     def export_plot(fig, name):
-        img_bytes = fig.to_image(format="png", width=1000, height=600)
-        html_bytes = fig.to_html(full_html=False).encode("utf-8")
-        st.download_button(f"⬇️ {name}.png", img_bytes, file_name=f"{name}.png", mime="image/png")
-        st.download_button(f"⬇️ {name}.html", html_bytes, file_name=f"{name}.html", mime="text/html")
+        # nothing is rendered until asked for; later reruns reuse the cached bytes
+        if st.button(f"🖼️ Prepare {name} downloads", key=f"prepare_{name}"):
+            st.session_state[f"prepared_{name}"] = True
+        if not st.session_state.get(f"prepared_{name}"):
+            return
+        with profiler.stage(f"render_{name}"):
+            renders = {fmt: plot_exporter.submit(fig, fmt) for fmt in PLOT_FORMATS}
+            for fmt, mime in PLOT_FORMATS.items():
+                st.download_button(f"⬇️ {name}.{fmt}", renders[fmt].result(), file_name=f"{name}.{fmt}", mime=mime)
 
-    export_plot(freq_fig, "event_frequency")
-    export_plot(user_fig, "user_activity")
-    if not df_anomalies.empty:
-        export_plot(anomaly_fig, "anomaly_plot")
+    for name, fig in figures.items():
+        export_plot(fig, name)
 else:
     st.info("👆 Upload multiple `.vlog` files to begin full forensic analysis.")
+
+# Performance panel
+profile_text = profiler.stop_capture()
+if profiler.records or profile_text:
+    with st.expander("⏱️ Performance", expanded=True):
+        perf = pd.DataFrame(profiler.table())
+        if not perf.empty:
+            for column in ("peak_rss_delta", "rss_delta"):
+                perf[column] = pd.to_numeric(perf[column]) / (1 << 20)
+            perf = perf.rename(columns={"peak_rss_delta": "peak_rss_delta_mb", "rss_delta": "rss_delta_mb"})
+            st.dataframe(perf, use_container_width=True)
+            st.caption(f"{profiler.total_seconds:.3f} s in timed stages")
+        if profile_text:
+            st.code(profile_text)
+            st.download_button("⬇️ profile.txt", profile_text, "profile.txt", mime="text/plain")
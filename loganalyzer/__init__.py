@@ -0,0 +1,46 @@
+"""Shared parsing and analysis code for the forensic `.vlog` dashboards.
+
+Names are imported from their modules on first use, so `import loganalyzer`
+(and the command line in `loganalyzer.cli`) starts without loading pandas.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "parser": [
+        "LOG_PATTERN", "ErrorLines", "LogEntry", "complete_lines", "iter_blocks", "iter_lines", "iter_log_batches",
+        "iter_log_frames", "normalize_line_breaks", "parse_block_columnar", "parse_lines_columnar",
+        "parse_log_file", "parse_log_lines", "parse_log_stream",
+    ],
+    "ingest": ["ingest"],
+    "cache": ["ParseCache"],
+    "rules": [
+        "ALL_RULES", "DEFAULT_RULES", "DESCRIPTIONS", "SENSITIVE_PATHS", "SHORT_DESCRIPTIONS", "CompiledRules",
+        "DistinctRule", "EventRule", "IncrementalDetector", "SequenceRule", "compile_rules", "detect_anomalies",
+        "load_rules", "rules_from_spec", "select_rules",
+    ],
+    "windows": ["SlidingHyperLogLog", "WindowDetector", "WindowDistinctRule", "WindowSequenceRule"],
+    "categorize": ["CATEGORY_MAP", "categorize"],
+    "pipeline": ["PipelineResult", "run_pipeline"],
+    "scoring": ["AnomalyScorer", "rolling_zscores", "window_features"],
+    "follow": ["LogFollower"],
+    "timeline": ["append", "compact", "expand", "pack_ipv4", "unpack_ipv4"],
+    "storage": ["read_table", "to_bytes", "write_table"],
+    "archive": ["Archive", "build_index", "query_index"],
+    "aggregate": ["TimelineAggregates", "bucket_width"],
+    "plotexport": ["PlotExporter"],
+    "export": ["report_zip"],
+    "synth": ["LogSynth", "write_logs"],
+    "geoip": ["IPDatabase", "enrich", "ip_locations", "load_ip_database"],
+}
+_MODULE_OF = {name: module for module, names in _EXPORTS.items() for name in names}
+__all__ = sorted(_MODULE_OF)
+
+
+def __getattr__(name):
+    module = _MODULE_OF.get(name)
+    if module is None:
+        raise AttributeError(f"module 'loganalyzer' has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"loganalyzer.{module}"), name)
+    globals()[name] = value
+    return value
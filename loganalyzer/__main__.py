@@ -0,0 +1,5 @@
+import sys
+
+from loganalyzer.cli import main
+
+sys.exit(main())
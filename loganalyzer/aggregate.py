@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+
+from loganalyzer.timeline import expand
+
+# Bucket widths (seconds) the charts step through as the time range changes
+NICE_WIDTHS = [1, 2, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 10800, 21600, 43200, 86400]
+DEFAULT_MAX_BUCKETS = 300       # bars per series in a frequency chart
+DEFAULT_STRIP_POINTS = 5000     # points in a strip plot
+
+
+def bucket_width(start, end, max_buckets=DEFAULT_MAX_BUCKETS):
+    """Smallest "nice" width that covers `[start, end]` in at most `max_buckets` buckets."""
+    span = max(int(end) - int(start) + 1, 1)
+    for width in NICE_WIDTHS:
+        if span <= width * max_buckets:
+            return width
+    days = -(-span // (NICE_WIDTHS[-1] * max_buckets))
+    return int(days * NICE_WIDTHS[-1])
+
+
+class TimelineAggregates:
+    """A timeline prepared for chart aggregates over any time range.
+
+    Timestamps are sorted once and the grouping columns are factorized once,
+    so every range only costs a binary search plus a pass over its own rows.
+    Charts are drawn from the results, so their size depends on the number of
+    buckets and points asked for, not on the number of events.
+    """
+
+    def __init__(self, df, columns=("ShortType", "user")):
+        self.df = df
+        timestamps = df["Timestamp"].to_numpy(dtype=np.int64)
+        self.order = np.argsort(timestamps, kind="stable")
+        self.timestamps = timestamps[self.order]
+        self.codes = {}
+        for column in columns:
+            if column in df:
+                codes, labels = pd.factorize(df[column], sort=True)
+                self.codes[column] = (codes[self.order], np.asarray(labels, dtype=object))
+
+    @property
+    def span(self):
+        """`(first, last)` Timestamp, or None for an empty timeline."""
+        if not len(self.timestamps):
+            return None
+        return int(self.timestamps[0]), int(self.timestamps[-1])
+
+    def _window(self, start, end):
+        lo = 0 if start is None else np.searchsorted(self.timestamps, start, side="left")
+        hi = len(self.timestamps) if end is None else np.searchsorted(self.timestamps, end, side="right")
+        return lo, hi
+
+    def _buckets(self, lo, hi, start, end, max_buckets):
+        start = int(self.timestamps[lo]) if start is None else int(start)
+        end = int(self.timestamps[hi - 1]) if end is None else int(end)
+        width = bucket_width(start, end, max_buckets)
+        origin = start - start % width
+        return (self.timestamps[lo:hi] - origin) // width, origin, width
+
+    def counts(self, by="ShortType", start=None, end=None, max_buckets=DEFAULT_MAX_BUCKETS):
+        """Events per time bucket and `by` value within `[start, end]`.
+
+        Returns `(counts, width)`: a frame with the bucket start ("Time"),
+        the `by` value and "Count" for every non-empty bucket, and the bucket
+        width in seconds.
+        """
+        lo, hi = self._window(start, end)
+        if lo >= hi:
+            return pd.DataFrame(columns=["Time", by, "Count"]), bucket_width(start or 0, end or 0, max_buckets)
+        buckets, origin, width = self._buckets(lo, hi, start, end, max_buckets)
+        codes, labels = self.codes[by]
+        codes = codes[lo:hi]
+        present = codes >= 0
+        keys = buckets[present] * len(labels) + codes[present]
+        keys, counts = np.unique(keys, return_counts=True)
+        return pd.DataFrame({
+            "Time": origin + keys // len(labels) * width,
+            by: labels[keys % len(labels)],
+            "Count": counts,
+        }), width
+
+    def strip_sample(self, start=None, end=None, y="user", color="ShortType", max_points=DEFAULT_STRIP_POINTS,
+                     max_buckets=DEFAULT_MAX_BUCKETS, seed=0):
+        """At most about `max_points` events of `[start, end]` for a strip plot of `y` over time.
+
+        Events are grouped into cells of (time bucket, `y`, `color`) and every
+        cell keeps the same share of its events (at least one while there are
+        fewer cells than points), so dense and sparse stretches keep their
+        relative density and rare events stay visible. The "Events" column
+        tells how many events each point stands for. A timeline without a `y`
+        or `color` column gives an empty frame.
+        """
+        empty = pd.DataFrame(columns=list(self.df.columns) + ["Events"])
+        if y not in self.codes or color not in self.codes:
+            return empty
+        lo, hi = self._window(start, end)
+        y_codes = self.codes[y][0][lo:hi]
+        rows = np.flatnonzero(y_codes >= 0)
+        if lo >= hi or not len(rows):
+            return empty
+        buckets = self._buckets(lo, hi, start, end, max_buckets)[0][rows]
+        color_codes = self.codes[color][0][lo:hi][rows] + 1
+        cells = pd.factorize(
+            (buckets * (y_codes.max() + 1) + y_codes[rows]) * (color_codes.max() + 1) + color_codes
+        )[0]
+        sizes = np.bincount(cells)
+        quota, weight = self._quota(sizes, max_points, seed)
+
+        # a random rank inside every cell; keep the first `quota` of each
+        rng = np.random.default_rng(seed)
+        shuffled = np.lexsort((rng.random(len(cells)), cells))
+        first_of_cell = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        rank = np.empty(len(cells), dtype=np.int64)
+        rank[shuffled] = np.arange(len(cells)) - first_of_cell[cells[shuffled]]
+        keep = np.sort(np.flatnonzero(rank < quota[cells]))
+
+        positions = self.order[lo:hi][rows[keep]]
+        sample = expand(self.df.iloc[positions])
+        sample["Events"] = weight[cells[keep]]
+        return sample.reset_index(drop=True)
+
+    @staticmethod
+    def _quota(sizes, max_points, seed):
+        """Points to keep per cell (one common share, at least 1) and the events each point stands for."""
+        if sizes.sum() <= max_points:
+            return sizes, np.ones(len(sizes))
+        if len(sizes) >= max_points:
+            # more cells than points: one point each for a density-weighted choice of cells
+            rng = np.random.default_rng(seed)
+            chosen = rng.choice(len(sizes), size=max_points, replace=False, p=sizes / sizes.sum())
+            quota = np.zeros(len(sizes), dtype=np.int64)
+            quota[chosen] = 1
+            return quota, np.full(len(sizes), sizes.sum() / max_points)
+        low, high = 0.0, 1.0
+        for _ in range(30):
+            share = (low + high) / 2
+            if np.ceil(sizes * share).sum() <= max_points:
+                low = share
+            else:
+                high = share
+        quota = np.maximum(np.ceil(sizes * low).astype(np.int64), 1)
+        return quota, sizes / quota
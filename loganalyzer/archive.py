@@ -0,0 +1,234 @@
+"""Time-partitioned on-disk index over a directory of `.vlog` files.
+
+    python -m loganalyzer.archive build <log dir> <index dir> [--bucket SECONDS]
+    python -m loganalyzer.archive query <index dir> [--user U] [--start T1] [--end T2] ...
+
+`build` parses every file into the compact timeline, cuts it into one
+Parquet partition per (time bucket, source file) and writes:
+
+    index.json        the partitions with their min/max Timestamp and row counts
+    postings.parquet  (column, value, partition) for user, ShortType, ip and path
+
+A query first narrows the partitions by time range and by the postings of
+each requested value, then reads only those partitions, letting Parquet skip
+row groups outside the time range.
+"""
+
+import argparse
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from loganalyzer.ingest import ingest
+from loganalyzer.timeline import compact, expand, pack_ipv4, unpack_ipv4
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # the archive is stored as Parquet
+    pa = None
+
+INDEX_VERSION = 1
+DEFAULT_BUCKET_SECONDS = 3600
+ROW_GROUP_SIZE = 1 << 16
+INDEXED_COLUMNS = ["user", "ShortType", "ip", "path"]
+
+_MANIFEST = "index.json"
+_POSTINGS = "postings.parquet"
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow is needed to build or query an archive index")
+
+
+# ----- Building -----
+def _clear_index(out_dir):
+    """Remove the files of a previous index build (and nothing else)."""
+    for path in glob.glob(os.path.join(out_dir, "part-*.parquet")):
+        os.remove(path)
+    for name in (_MANIFEST, _POSTINGS):
+        if os.path.exists(os.path.join(out_dir, name)):
+            os.remove(os.path.join(out_dir, name))
+
+
+def _postings(df, partition):
+    """(column, value, partition) rows for the indexed values present in `df`."""
+    rows = []
+    for column in INDEXED_COLUMNS:
+        if column not in df:
+            continue
+        values = df[column].dropna().unique()
+        if column == "ip" and df[column].dtype == "UInt32":
+            values = unpack_ipv4(pd.Series(values, dtype="UInt32"))
+        for value in values:
+            rows.append((column, str(value), partition))
+    return rows
+
+
+def build_index(directory, out_dir, bucket_seconds=DEFAULT_BUCKET_SECONDS, pattern="*.vlog", workers=None):
+    """Index every `pattern` file of `directory` into `out_dir` and return the manifest.
+
+    Files are ingested one at a time, so memory stays bounded by the largest
+    file rather than the archive.
+    """
+    _require_pyarrow()
+    os.makedirs(out_dir, exist_ok=True)
+    _clear_index(out_dir)
+
+    partitions = []
+    postings = []
+    error_count = 0
+    for path in sorted(glob.glob(os.path.join(directory, pattern))):
+        df, _, errors = ingest([path], workers=workers)
+        error_count += errors.total
+        if df.empty:
+            continue
+        buckets = df["Timestamp"].to_numpy() // bucket_seconds
+        for bucket, rows in pd.Series(np.arange(len(df))).groupby(buckets).indices.items():
+            part = compact(df.iloc[rows])   # drop categories of other buckets
+            partition = len(partitions)
+            name = f"part-{partition:06d}.parquet"
+            table = pa.Table.from_pandas(part, preserve_index=False)
+            pq.write_table(table, os.path.join(out_dir, name), row_group_size=ROW_GROUP_SIZE)
+            timestamps = part["Timestamp"]
+            partitions.append({
+                "id": partition, "file": name, "source": os.path.basename(path), "bucket": int(bucket),
+                "min_ts": int(timestamps.min()), "max_ts": int(timestamps.max()), "rows": len(part),
+            })
+            postings.extend(_postings(part, partition))
+
+    postings = pd.DataFrame(postings, columns=["column", "value", "partition"])
+    postings = postings.sort_values(["column", "value", "partition"], kind="stable")
+    postings["partition"] = postings["partition"].astype(np.int32)
+    pq.write_table(pa.Table.from_pandas(postings, preserve_index=False), os.path.join(out_dir, _POSTINGS))
+
+    manifest = {
+        "version": INDEX_VERSION, "bucket_seconds": bucket_seconds,
+        "rows": sum(part["rows"] for part in partitions), "errors": error_count, "partitions": partitions,
+    }
+    with open(os.path.join(out_dir, _MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+# ----- Querying -----
+class Archive:
+    """Read side of an index written by `build_index`."""
+
+    def __init__(self, index_dir):
+        _require_pyarrow()
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, _MANIFEST), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("version") != INDEX_VERSION:
+            raise ValueError(f"{index_dir} was built by another version; rebuild the index")
+        self.partitions = pd.DataFrame(
+            self.manifest["partitions"], columns=["id", "file", "source", "bucket", "min_ts", "max_ts", "rows"]
+        )
+        self._postings = None
+
+    @property
+    def postings(self):
+        """{(column, value): partition ids}, loaded on first use."""
+        if self._postings is None:
+            table = pq.read_table(os.path.join(self.index_dir, _POSTINGS)).to_pandas()
+            partition = table["partition"].to_numpy()
+            self._postings = {
+                key: partition[rows]
+                for key, rows in table.groupby(["column", "value"], sort=False).indices.items()
+            }
+        return self._postings
+
+    def partitions_for(self, start=None, end=None, **values):
+        """Ids of the partitions that can hold events in `[start, end]` with all `values`."""
+        keep = np.ones(len(self.partitions), dtype=bool)
+        if start is not None:
+            keep &= self.partitions["max_ts"].to_numpy() >= start
+        if end is not None:
+            keep &= self.partitions["min_ts"].to_numpy() <= end
+        ids = self.partitions["id"].to_numpy()[keep]
+        for column, value in values.items():
+            if value is not None:
+                ids = np.intersect1d(ids, self.postings.get((column, str(value)), np.array([], dtype=np.int32)))
+        return ids
+
+    def query(self, start=None, end=None, user=None, short_type=None, ip=None, path=None, columns=None):
+        """Events with `start <= Timestamp <= end` matching every given value, sorted by Timestamp.
+
+        Only the partitions selected by `partitions_for` are read.
+        """
+        values = {"user": user, "ShortType": short_type, "ip": ip, "path": path}
+        filters = []
+        if start is not None:
+            filters.append(("Timestamp", ">=", int(start)))
+        if end is not None:
+            filters.append(("Timestamp", "<=", int(end)))
+        for column, value in values.items():
+            if value is not None:
+                filters.append((column, "==", value))
+        packed = pack_ipv4(pd.Series([ip])) if ip is not None else None
+
+        frames = []
+        for partition in self.partitions_for(start, end, **values):
+            part_path = os.path.join(self.index_dir, self.partitions.at[partition, "file"])
+            schema = pq.read_schema(part_path, memory_map=True)
+            if any(column not in schema.names for column, _, _ in filters):
+                continue
+            part_filters = filters
+            if packed is not None and pa.types.is_integer(schema.field("ip").type):
+                # ip is stored packed unless some address of the partition was not plain IPv4
+                part_filters = [(c, op, int(packed[0]) if c == "ip" else v) for c, op, v in filters]
+            wanted = None if columns is None else [column for column in columns if column in schema.names]
+            table = pq.read_table(part_path, columns=wanted, filters=part_filters or None, memory_map=True)
+            if table.num_rows:
+                frames.append(table.to_pandas())
+        if not frames:
+            return pd.DataFrame(columns=columns or [])
+        df = compact(pd.concat(frames, ignore_index=True))
+        if "Timestamp" in df:
+            df = df.sort_values("Timestamp", kind="stable").reset_index(drop=True)
+        return df
+
+
+def query_index(index_dir, **kwargs):
+    """One-off `Archive(index_dir).query(**kwargs)`."""
+    return Archive(index_dir).query(**kwargs)
+
+
+# ----- Command line -----
+def main(argv=None, prog="python -m loganalyzer.archive"):
+    parser = argparse.ArgumentParser(prog=prog,
+                                     description="Build or query a time-partitioned .vlog index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="index a directory of .vlog files")
+    build.add_argument("directory")
+    build.add_argument("index_dir")
+    build.add_argument("--bucket", type=int, default=DEFAULT_BUCKET_SECONDS, help="partition width in seconds")
+    build.add_argument("--pattern", default="*.vlog")
+    build.add_argument("--workers", type=int, default=None)
+    query = commands.add_parser("query", help="print the events matching a query as CSV")
+    query.add_argument("index_dir")
+    query.add_argument("--start", type=int)
+    query.add_argument("--end", type=int)
+    query.add_argument("--user")
+    query.add_argument("--type", dest="short_type")
+    query.add_argument("--ip")
+    query.add_argument("--path")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        manifest = build_index(args.directory, args.index_dir, args.bucket, args.pattern, args.workers)
+        print(f"Indexed {manifest['rows']} events into {len(manifest['partitions'])} partitions "
+              f"({manifest['errors']} malformed lines skipped).")
+    else:
+        df = query_index(args.index_dir, start=args.start, end=args.end, user=args.user,
+                         short_type=args.short_type, ip=args.ip, path=args.path)
+        print(expand(df).to_csv(index=False), end="")
+
+
+if __name__ == "__main__":
+    main()
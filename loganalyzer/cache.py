@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from loganalyzer.parser import PARSER_VERSION
+from loganalyzer.rules import DEFAULT_RULES, DESCRIPTIONS, RULES_VERSION, detect_anomalies, select_rules
+
+try:
+    import pyarrow  # noqa: F401  (needed by DataFrame.to_parquet)
+except ImportError:  # no on-disk spill without pyarrow
+    pyarrow = None
+
+DEFAULT_CACHE_BYTES = 1 << 30   # in-memory budget for cached frames
+
+
+def _frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class ParseCache:
+    """LRU cache of parsed frames keyed by file content, bounded by a byte budget.
+
+    Entries are `(DataFrame, meta)` pairs where `meta` is anything JSON can
+    hold. When the frames in memory outgrow `max_bytes`, the least recently
+    used entries are dropped, or written to `spill_dir` as Parquet (plus a
+    JSON file for `meta`) when a spill directory is given and pyarrow is
+    installed. Cached frames are shared between callers: treat them as
+    read-only.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES, spill_dir=None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir if pyarrow is not None else None
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._digests = {}     # memo of a path or upload -> content digest
+        self._memo_keys = {}   # the same memo -> the cache key it produced
+        self._lock = threading.Lock()
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    # ----- Keys -----
+    def source_key(self, source):
+        """Key of one path or upload: its content hash, base name and the parser version.
+
+        The name is part of the key because it ends up in the `File` column
+        and error records of the parsed frame. The hash of a path is
+        remembered per (path, size, mtime) and the hash of an upload per
+        upload id, so an unchanged file is only read once while its entry
+        is in memory. Remembered hashes are forgotten with their entries.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            path = os.fspath(source)
+            name = os.path.basename(path)
+            stat = os.stat(path)
+            memo = ("path", os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        else:
+            name = source.name
+            file_id = getattr(source, "file_id", None)
+            memo = ("upload", source.name, file_id) if file_id is not None else None
+        digest = self._digests.get(memo) if memo is not None else None
+        if digest is None:
+            digest = hashlib.blake2b(digest_size=20)
+            if isinstance(source, (str, os.PathLike)):
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b""):
+                        digest.update(chunk)
+            else:
+                digest.update(source.getvalue())
+            digest = digest.hexdigest()
+        named = hashlib.blake2b(f"{digest}/{name}".encode(), digest_size=20).hexdigest()
+        key = f"parse-{PARSER_VERSION}-{named}"
+        if memo is not None:
+            with self._lock:
+                self._digests[memo] = digest
+                self._memo_keys[memo] = key
+        return key
+
+    # ----- Entries -----
+    def get(self, key):
+        """The `(df, meta)` stored under `key`, or None."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], entry[1]
+        entry = self._load_spilled(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self.put(key, *entry)
+        return entry
+
+    def put(self, key, df, meta=None):
+        with self._lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= old[2]
+            nbytes = _frame_bytes(df)
+            self.entries[key] = (df, meta, nbytes)
+            self.size += nbytes
+            evicted = []
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                old_key, old = self.entries.popitem(last=False)
+                self.size -= old[2]
+                evicted.append((old_key, old))
+            if evicted:
+                self._forget_digests()
+        for old_key, (old_df, old_meta, _) in evicted:
+            self._spill(old_key, old_df, old_meta)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.size = 0
+            self._forget_digests()
+
+    def _forget_digests(self):
+        # remembered hashes live only as long as their entry is in memory (call with the lock held)
+        for memo, key in list(self._memo_keys.items()):
+            if key not in self.entries:
+                del self._memo_keys[memo]
+                self._digests.pop(memo, None)
+
+    # ----- Spill to disk -----
+    def _spill_paths(self, key):
+        return os.path.join(self.spill_dir, key + ".parquet"), os.path.join(self.spill_dir, key + ".json")
+
+    def _spill(self, key, df, meta):
+        if not self.spill_dir:
+            return
+        frame_path, meta_path = self._spill_paths(key)
+        if os.path.exists(meta_path):
+            return
+        try:
+            df.to_parquet(frame_path + ".tmp")
+        except (pyarrow.ArrowException, TypeError, ValueError):
+            # e.g. an object column mixing numbers and text: keep it in memory only
+            if os.path.exists(frame_path + ".tmp"):
+                os.remove(frame_path + ".tmp")
+            return
+        os.replace(frame_path + ".tmp", frame_path)
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f, default=int)
+        os.replace(meta_path + ".tmp", meta_path)   # written last: marks the entry complete
+
+    def _load_spilled(self, key):
+        if not self.spill_dir:
+            return None
+        frame_path, meta_path = self._spill_paths(key)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        return pd.read_parquet(frame_path), meta
+
+    # ----- Cached analysis -----
+    def detect_anomalies(self, sources, df_logs, rules=None, descriptions=DESCRIPTIONS,
+                         ruleset=DEFAULT_RULES):
+        """`rules.detect_anomalies` over the timeline of `sources`, cached.
+
+        The key combines the content keys of the sources with the rule
+        definitions, the selected ids, the wording and the rules version.
+        """
+        selected = [vars(rule) for rule in select_rules(ruleset, rules)]
+        rule_spec = json.dumps([selected, descriptions], sort_keys=True, default=str)
+        digest = hashlib.blake2b(digest_size=20)
+        for source in sources:
+            digest.update(self.source_key(source).encode())
+        digest.update(rule_spec.encode())
+        key = f"anomalies-{RULES_VERSION}-{digest.hexdigest()}"
+        entry = self.get(key)
+        if entry is not None:
+            return entry[0]
+        anomalies = detect_anomalies(df_logs, rules=rules, descriptions=descriptions, ruleset=ruleset)
+        self.put(key, anomalies)
+        return anomalies
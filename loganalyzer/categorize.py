@@ -0,0 +1,17 @@
+# Map ShortType to Category
+CATEGORY_MAP = {
+    "EXEC": "User Activity",
+    "DEL": "User Activity",
+    "FILE": "User Activity",
+    "LOG": "User Activity",
+    "SHDW": "Process Control",
+    "CONN": "Network Activity"
+}
+UNKNOWN_CATEGORY = "Unknown"
+
+
+def categorize(df, category_map=CATEGORY_MAP):
+    """Copy of `df` with a "Category" column derived from "ShortType"."""
+    df = df.copy()
+    df["Category"] = df["ShortType"].astype(object).map(category_map).fillna(UNKNOWN_CATEGORY)
+    return df
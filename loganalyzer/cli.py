@@ -0,0 +1,147 @@
+"""Headless batch mode: parse -> categorize -> detect without Streamlit or a browser.
+
+    python -m loganalyzer analyze <dir | glob | file> ... [-o OUTPUT_DIR] [--format parquet]
+    python -m loganalyzer index <log dir> <index dir>
+    python -m loganalyzer query <index dir> [--user U] [--start T1] [--end T2] ...
+
+pandas and the rest of the library are only imported once the arguments
+are parsed, so `--help` and argument errors return immediately.
+"""
+
+import argparse
+import glob
+import os
+import sys
+
+OUTPUT_FORMATS = ["parquet", "feather", "csv", "jsonl", "json"]
+
+
+def collect_sources(inputs, pattern="*.vlog", recursive=False):
+    """Files named by `inputs`: directories (searched for `pattern`), globs or plain paths.
+
+    Each file is listed once, in the order it was first named.
+    """
+    sources = []
+    for item in inputs:
+        if os.path.isdir(item):
+            search = os.path.join(item, "**", pattern) if recursive else os.path.join(item, pattern)
+            found = sorted(glob.glob(search, recursive=recursive))
+        elif any(char in item for char in "*?["):
+            found = sorted(glob.glob(item, recursive=True))
+        else:
+            found = [item]
+        sources.extend(path for path in found if os.path.isfile(path))
+    return list(dict.fromkeys(sources))
+
+
+def _analyze(args):
+    from loganalyzer.categorize import CATEGORY_MAP
+    from loganalyzer.export import summary_text
+    from loganalyzer.pipeline import run_pipeline
+    from loganalyzer.profiling import Profiler, enable_logging
+    from loganalyzer.rules import DEFAULT_RULES, load_rules
+    from loganalyzer.storage import write_table
+
+    sources = collect_sources(args.inputs, args.pattern, args.recursive)
+    if not sources:
+        print("No .vlog files found.", file=sys.stderr)
+        return 1
+
+    ruleset = load_rules(args.rules_file) if args.rules_file else DEFAULT_RULES
+    rules = tuple(args.rules.split(",")) if args.rules else None
+    if args.timings:
+        enable_logging(sys.stderr)
+    profiler = Profiler(enabled=args.timings)
+    if args.profile:
+        try:
+            profiler.start_capture(args.profile)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+    scorer = None
+    if args.score or args.model:
+        from loganalyzer.scoring import AnomalyScorer
+        scorer = AnomalyScorer.load(args.model) if args.model and os.path.exists(args.model) else AnomalyScorer()
+    result = run_pipeline(sources, workers=args.workers, rules=rules, ruleset=ruleset,
+                          category_map=None if args.no_categories else CATEGORY_MAP, profiler=profiler, scorer=scorer)
+    if args.model and scorer.fitted:
+        scorer.save(args.model)
+
+    timeline, locations = result.timeline, None
+    if args.ip_db:
+        from loganalyzer.geoip import enrich, ip_locations, load_ip_database
+        try:
+            database = load_ip_database(args.ip_db, layout=args.ip_db_layout)
+        except (OSError, ValueError) as e:
+            print(e, file=sys.stderr)
+            return 2
+        with profiler.stage("geoip", rows_in=len(timeline)) as stage:
+            timeline = enrich(timeline, database)
+            locations = ip_locations(timeline, database)
+            stage.rows_out = len(locations)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    outputs = [
+        (f"timeline.{args.format}", timeline),
+        (f"anomaly_report.{args.format}", result.anomalies),
+    ]
+    if locations is not None:
+        outputs.append(("ip_locations.csv", locations))
+    if result.error_lines:
+        import pandas as pd
+        outputs.append(("malformed_lines.csv", pd.DataFrame(result.error_lines)))
+    with profiler.stage("write", rows_in=sum(len(df) for _, df in outputs)):
+        for name, df in outputs:
+            write_table(df, os.path.join(args.output_dir, name))
+        with open(os.path.join(args.output_dir, "summary.txt"), "w", encoding="utf-8") as f:
+            f.write(summary_text(result.summary_stats))
+    if args.profile:
+        with open(os.path.join(args.output_dir, "profile.txt"), "w", encoding="utf-8") as f:
+            f.write(profiler.stop_capture())
+
+    print(f"Parsed {len(result.timeline)} events from {len(sources)} file(s), "
+          f"{result.error_lines.total} malformed line(s), {len(result.anomalies)} anomalies.")
+    if len(result.error_lines) < result.error_lines.total:
+        counts = ", ".join(f"{error}: {count}" for error, count in sorted(result.error_lines.counts.items()))
+        print(f"Only the first {len(result.error_lines)} malformed lines are in malformed_lines.csv ({counts}).")
+    print(f"Reports written to {args.output_dir}")
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in ("index", "query"):
+        from loganalyzer.archive import main as archive_main
+        return archive_main(["build" if argv[0] == "index" else "query"] + argv[1:],
+                            prog=f"python -m loganalyzer {argv[0]}")
+
+    parser = argparse.ArgumentParser(prog="python -m loganalyzer", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True, metavar="{analyze,index,query}")
+    commands.add_parser("index", help="build a time-partitioned archive index (see `index --help`)")
+    commands.add_parser("query", help="query an archive index (see `query --help`)")
+    analyze = commands.add_parser("analyze", help="parse, categorize and detect anomalies in .vlog files")
+    analyze.add_argument("inputs", nargs="+", help=".vlog files, directories or glob patterns")
+    analyze.add_argument("-o", "--output-dir", default="forensic_reports")
+    analyze.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="csv",
+                         help="format of the timeline and anomaly report (default: csv)")
+    analyze.add_argument("--pattern", default="*.vlog", help="files to pick up in directories")
+    analyze.add_argument("-r", "--recursive", action="store_true", help="search directories recursively")
+    analyze.add_argument("--workers", type=int, default=None, help="parser processes (default: all cores)")
+    analyze.add_argument("--rules", help="comma-separated rule ids to run (default: all)")
+    analyze.add_argument("--rules-file", help="JSON/YAML rule spec to use instead of R1-R5")
+    analyze.add_argument("--no-categories", action="store_true", help="leave out the Category column")
+    analyze.add_argument("--score", action="store_true",
+                         help="add z-score / Isolation Forest hits on 10 s windows to the anomaly report")
+    analyze.add_argument("--model", help="fitted scorer to reuse (created on first use); implies --score")
+    analyze.add_argument("--ip-db", help="local IP-range CSV; adds location columns and writes ip_locations.csv")
+    analyze.add_argument("--ip-db-layout", help="column layout of an --ip-db file without a header row, "
+                                                 "e.g. dbip-city or ip2location-db5")
+    analyze.add_argument("--timings", action="store_true", help="log time, rows and memory of every stage as JSON")
+    analyze.add_argument("--profile", choices=["cprofile", "pyinstrument"],
+                         help="profile the run and write profile.txt to the output folder")
+    args = parser.parse_args(argv)
+    return _analyze(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+import tempfile
+import zipfile
+
+from loganalyzer.timeline import expand
+
+DEFAULT_CHUNK_ROWS = 50_000        # rows converted to text at a time
+SPOOL_MAX_BYTES = 32 << 20         # exports larger than this go to a temporary file
+
+# ZIP member compression: label -> ZipFile arguments
+ZIP_COMPRESSION = {
+    "none": {"compression": zipfile.ZIP_STORED},
+    "fast": {"compression": zipfile.ZIP_DEFLATED, "compresslevel": 1},
+    "small": {"compression": zipfile.ZIP_DEFLATED, "compresslevel": 9},
+}
+# Table formats: label -> file extension
+TABLE_FORMATS = {"CSV": "csv", "JSON Lines": "jsonl", "JSON": "json"}
+
+
+# ----- Chunked writers -----
+def _chunks(df, chunk_rows):
+    # expand() writes pids as floats when some are missing; decide once for the whole frame
+    float_pid = "pid" in df and df["pid"].dtype == "Int32" and df["pid"].hasnans
+    for start in range(0, len(df), chunk_rows):
+        chunk = expand(df.iloc[start:start + chunk_rows])
+        if float_pid:
+            chunk["pid"] = chunk["pid"].astype(float)
+        yield start, chunk
+
+
+def iter_csv(df, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """CSV text of `df` (in its textual form), `chunk_rows` rows at a time."""
+    if not len(df):
+        yield expand(df).to_csv(index=False)
+        return
+    for start, chunk in _chunks(df, chunk_rows):
+        yield chunk.to_csv(index=False, header=start == 0)
+
+
+def iter_json_lines(df, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """One JSON object per row, `chunk_rows` rows at a time."""
+    for _, chunk in _chunks(df, chunk_rows):
+        yield chunk.to_json(orient="records", lines=True, force_ascii=False)
+
+
+def iter_json_array(df, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """A JSON array of row objects, written out `chunk_rows` rows at a time."""
+    yield "["
+    for start, chunk in _chunks(df, chunk_rows):
+        records = chunk.to_json(orient="records", lines=True, force_ascii=False).rstrip("\n")
+        yield ("," if start else "") + "\n" + records.replace("\n", ",\n")
+    yield "\n]\n"
+
+
+_WRITERS = {"csv": iter_csv, "jsonl": iter_json_lines, "json": iter_json_array}
+
+
+def write_chunks(stream, chunks):
+    for chunk in chunks:
+        stream.write(chunk.encode("utf-8"))
+
+
+def spooled(chunks):
+    """A temporary file (in memory while small) holding the encoded `chunks`, rewound."""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    write_chunks(spool, chunks)
+    spool.seek(0)
+    return spool
+
+
+def table_chunks(df, extension, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Text chunks of `df` as "csv", "jsonl" or "json"."""
+    return _WRITERS[extension](df, chunk_rows)
+
+
+# ----- Report archive -----
+def summary_text(summary_stats):
+    return "\n".join([f"{k}: {v}" for k, v in summary_stats.items()])
+
+
+def report_zip(df_logs, df_anomalies, summary_stats, table_format="CSV", compression="none",
+               figures=None, plot_exporter=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Write the report ZIP to a spooled temporary file and return it rewound.
+
+    The timeline and anomaly report are converted and compressed chunk by
+    chunk straight into their ZIP members, so only one chunk of text is in
+    memory at a time. `figures` (`{name: figure}`) are rendered by
+    `plot_exporter` into "plots/".
+    """
+    extension = TABLE_FORMATS[table_format]
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    with zipfile.ZipFile(spool, "w", **ZIP_COMPRESSION[compression]) as zipf:
+        for name, df in (("timeline", df_logs), ("anomaly_report", df_anomalies)):
+            with zipf.open(f"{name}.{extension}", "w", force_zip64=True) as member:
+                write_chunks(member, table_chunks(df, extension, chunk_rows))
+        zipf.writestr("summary.txt", summary_text(summary_stats))
+        if figures:
+            plot_exporter.write_zip(zipf, figures)
+    spool.seek(0)
+    return spool
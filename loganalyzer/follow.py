@@ -0,0 +1,108 @@
+import glob
+import os
+
+import pandas as pd
+
+from loganalyzer.parser import DEFAULT_CHUNK_SIZE, ErrorLines, complete_lines, parse_block_columnar
+from loganalyzer.rules import DESCRIPTIONS, IncrementalDetector
+from loganalyzer.timeline import append
+
+
+class _FileState:
+    """How far one followed file has been read."""
+
+    def __init__(self):
+        self.offset = 0        # byte offset just after the last complete line
+        self.lines = 0         # complete lines read so far
+        self.last_index = -1   # highest 0x index seen so far
+
+
+class LogFollower:
+    """Tail every `.vlog` file of a local directory and analyze what gets appended.
+
+    Each `poll()` reads the complete lines written since the previous poll,
+    parses only those, and feeds them to an `IncrementalDetector`. Appended
+    data is read in blocks of `chunk_size` bytes, like `parser.iter_blocks`,
+    and a line the writer has not finished yet is left for the next poll.
+    Lines whose `0x` index is not above the last one seen in that file are
+    skipped, and a file that got shorter (rotated or truncated) is read again
+    from the start.
+    """
+
+    def __init__(self, directory, pattern="*.vlog", rules=None, descriptions=DESCRIPTIONS,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+        self.directory = directory
+        self.pattern = pattern
+        self.chunk_size = chunk_size
+        self.files = {}
+        self.detector = IncrementalDetector(rules, descriptions)
+        self.summary_stats = {}
+        self.error_lines = ErrorLines()
+        self.timeline = pd.DataFrame()
+        self._anomalies = None
+
+    def _read_new(self, path, state):
+        """Yield blocks of the complete lines appended to `path` since the last poll.
+
+        `state.offset` moves past each block as it is handed out.
+        """
+        size = os.path.getsize(path)
+        if size < state.offset:
+            state.offset, state.lines, state.last_index = 0, 0, -1
+        with open(path, "rb") as f:
+            f.seek(state.offset)
+            rest = b""
+            remaining = size - state.offset
+            while remaining > 0:
+                chunk = f.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                data = rest + chunk
+                block, rest = complete_lines(data)
+                if block is not None:
+                    state.offset += len(data) - len(rest)
+                    yield block
+
+    def poll(self):
+        """Parse what was appended since the last call.
+
+        Returns `(new_rows, new_anomalies)`.
+        """
+        frames = []
+        for path in sorted(glob.glob(os.path.join(self.directory, self.pattern))):
+            name = os.path.basename(path)
+            state = self.files.setdefault(name, _FileState())
+            for block in self._read_new(path, state):
+                df, errors = parse_block_columnar(block, name, start=state.lines + 1)
+                state.lines += block.count(b"\n") + 1
+                self.error_lines.merge(errors)
+                if df.empty:
+                    continue
+                index = df["Index"].map(lambda value: int(value, 16))
+                df = df[index > state.last_index]
+                if df.empty:
+                    continue
+                state.last_index = int(index.max())
+                frames.append(df)
+
+        if not frames:
+            return pd.DataFrame(), pd.DataFrame()
+        batch = pd.concat(frames, ignore_index=True).sort_values("Timestamp", kind="stable")
+        for short, count in batch["ShortType"].value_counts(sort=False).items():
+            self.summary_stats[short] = self.summary_stats.get(short, 0) + count
+        # `timeline`: every event read so far, compact and sorted by `Timestamp`
+        seen = len(self.timeline)
+        self.timeline = append(self.timeline, batch)
+        timestamps = self.timeline["Timestamp"]
+        if seen and timestamps.iloc[seen:].min() < timestamps.iloc[seen - 1]:
+            self.timeline = self.timeline.sort_values("Timestamp", kind="stable", ignore_index=True)
+        self._anomalies = None
+        return batch, self.detector.update(batch)
+
+    @property
+    def anomalies(self):
+        """All hits so far, built once per batch."""
+        if self._anomalies is None:
+            self._anomalies = self.detector.anomalies
+        return self._anomalies
@@ -0,0 +1,176 @@
+"""Offline IP geo-location from a local IP-range database: no network calls.
+
+The database is a CSV (optionally gzipped) of IPv4 ranges with their
+location, such as the free DB-IP lite or IP2Location LITE downloads:
+
+    start,end,country,city,latitude,longitude
+    1.0.0.0,1.0.0.255,AU,South Brisbane,-27.4748,153.017
+
+Addresses may be dotted or integers. Files without a header row need a
+`layout` (see `LAYOUTS`). IPv6 rows are skipped. Ranges are kept as two
+sorted uint32 arrays, so a lookup is one binary search.
+
+`IPDatabase.lookup` (bisect plus an LRU cache) answers single addresses.
+`enrich` and `ip_locations` do not go through it: they factorize the IP
+column and search every distinct address at once with `locate`
+(`searchsorted`), which replaces per-address lookups for whole timelines.
+"""
+
+import bisect
+import functools
+import ipaddress
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_SIZE = 1 << 16    # distinct addresses remembered by `IPDatabase.lookup`
+
+# Header names accepted for every column
+_ALIASES = {
+    "start": ["start", "start_ip", "ip_start", "ip_from", "network_start", "first"],
+    "end": ["end", "end_ip", "ip_end", "ip_to", "network_end", "last"],
+    "country": ["country", "country_code", "country_iso_code", "cc"],
+    "region": ["region", "stateprov", "subdivision", "region_name"],
+    "city": ["city", "city_name"],
+    "latitude": ["latitude", "lat"],
+    "longitude": ["longitude", "lon", "lng"],
+}
+# Column names of well-known files that come without a header row
+LAYOUTS = {
+    "dbip-country": ["start", "end", "country"],
+    "dbip-city": ["start", "end", "continent", "country", "region", "city", "latitude", "longitude"],
+    "ip2location-db1": ["start", "end", "country", "country_name"],
+    "ip2location-db5": ["start", "end", "country", "country_name", "region", "city", "latitude", "longitude"],
+}
+
+
+def _ipv4_int(value):
+    """Integer of an IPv4 address given dotted or as an integer, or -1."""
+    try:
+        if isinstance(value, str) and value.strip().isdigit():
+            value = int(value)
+        return int(ipaddress.IPv4Address(value.strip() if isinstance(value, str) else int(value)))
+    except (ipaddress.AddressValueError, ValueError, TypeError):
+        return -1
+
+
+def packed_ips(values):
+    """`(codes, packed)`: factorized `values` and the int64 address of every distinct value (-1 if not IPv4).
+
+    Each distinct address is converted once; `codes` is -1 where a value is missing.
+    """
+    values = pd.Series(values)
+    codes, uniques = pd.factorize(values)
+    if str(values.dtype) == "UInt32":       # compact timeline: already packed
+        return codes, np.asarray(uniques, dtype=np.int64)
+    return codes, np.array([_ipv4_int(value) for value in uniques], dtype=np.int64)
+
+
+# ----- Database -----
+class IPDatabase:
+    """Sorted, non-overlapping IPv4 ranges with a location record per range."""
+
+    def __init__(self, starts, ends, records, cache_size=DEFAULT_CACHE_SIZE):
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        order = np.argsort(starts, kind="stable")
+        self.starts, self.ends = starts[order], ends[order]
+        self.records = records.iloc[order].reset_index(drop=True)
+        if (self.ends < self.starts).any() or (self.starts[1:] <= self.ends[:-1]).any():
+            raise ValueError("IP ranges must not be empty or overlap")
+        self._start_list = self.starts.tolist()
+        self.lookup = functools.lru_cache(maxsize=cache_size)(self._lookup)
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def fields(self):
+        return list(self.records.columns)
+
+    def _lookup(self, ip):
+        """Location record (dict) of one address, or None. Cached per address as `lookup`."""
+        packed = _ipv4_int(ip)
+        position = bisect.bisect_right(self._start_list, packed) - 1
+        if packed < 0 or position < 0 or packed > self.ends[position]:
+            return None
+        return self.records.iloc[position].to_dict()
+
+    def locate(self, packed):
+        """Record index of every packed address (int64 array), -1 where no range holds it."""
+        packed = np.asarray(packed, dtype=np.int64)
+        position = np.searchsorted(self.starts, packed, side="right") - 1
+        found = (packed >= 0) & (position >= 0)
+        found[found] &= packed[found] <= self.ends[position[found]]
+        return np.where(found, position, -1)
+
+    def record_index(self, values):
+        """Record index for every value of an IP column; each distinct address is searched once."""
+        codes, packed = packed_ips(values)
+        located = np.append(self.locate(packed), -1)
+        return located[codes]
+
+    def lookup_many(self, values):
+        """Location fields for a whole IP column (NaN where unknown), aligned with `values`."""
+        index = self.record_index(values)
+        records = pd.concat([self.records, pd.DataFrame(index=[len(self.records)])], ignore_index=False)
+        result = records.iloc[np.where(index < 0, len(self.records), index)].reset_index(drop=True)
+        result.index = values.index if isinstance(values, pd.Series) else result.index
+        return result
+
+
+def load_ip_database(path, layout=None, cache_size=DEFAULT_CACHE_SIZE):
+    """Read an IP-range CSV (see the module docstring) into an `IPDatabase`."""
+    if layout is not None:
+        if layout not in LAYOUTS:
+            raise ValueError(f"unknown IP database layout {layout!r}; known: {', '.join(LAYOUTS)}")
+        frame = pd.read_csv(path, header=None, names=LAYOUTS[layout], dtype=str, keep_default_na=False)
+    else:
+        frame = pd.read_csv(path, dtype=str, keep_default_na=False)
+        frame.columns = [str(column).strip().lower() for column in frame.columns]
+    columns = {}
+    for name, aliases in _ALIASES.items():
+        match = next((alias for alias in aliases if alias in frame.columns), None)
+        if match is not None:
+            columns[name] = frame[match]
+    if not {"start", "end", "country"} <= set(columns):
+        raise ValueError(f"{path}: no start/end/country columns; give a header row or one of the layouts "
+                         f"{list(LAYOUTS)}")
+
+    starts = np.array([_ipv4_int(value) for value in columns.pop("start")], dtype=np.int64)
+    ends = np.array([_ipv4_int(value) for value in columns.pop("end")], dtype=np.int64)
+    keep = (starts >= 0) & (ends >= 0)      # IPv6 rows
+    records = pd.DataFrame({name: values[keep].reset_index(drop=True) for name, values in columns.items()})
+    for name in ("latitude", "longitude"):
+        if name in records:
+            records[name] = pd.to_numeric(records[name], errors="coerce")
+    return IPDatabase(starts[keep], ends[keep], records, cache_size)
+
+
+# ----- Timeline helpers -----
+def enrich(df, database, column="ip"):
+    """Copy of `df` with the location fields of its `column` addresses ("Country", "City", ...)."""
+    df = df.copy()
+    located = database.lookup_many(df[column])
+    for field in database.fields:
+        df[field.title()] = located[field].to_numpy()
+    return df
+
+
+def ip_locations(df, database, column="ip"):
+    """Events and distinct addresses per location (one row per distinct location record), for maps.
+
+    Addresses no range holds are counted in one row with empty location fields.
+    """
+    ips = df[column].dropna() if column in df else pd.Series([], dtype=object)
+    codes, packed = packed_ips(ips)
+    located = np.append(database.locate(packed), -1)
+    fields = [field.title() for field in database.fields]
+    records = pd.concat([database.records, pd.DataFrame(index=[len(database.records)])])
+    records.columns = fields
+    rows = located[codes]
+    events = records.iloc[np.where(rows < 0, len(database.records), rows)].reset_index(drop=True)
+    events["address"] = codes
+    locations = events.groupby(fields, dropna=False, sort=False).agg(
+        Events=("address", "size"), IPs=("address", "nunique")).reset_index()
+    return locations.sort_values("Events", ascending=False, kind="stable").reset_index(drop=True)
@@ -0,0 +1,217 @@
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from loganalyzer.parser import DEFAULT_ERROR_LIMIT, ErrorLines, parse_log_stream
+from loganalyzer.profiling import NULL_PROFILER
+from loganalyzer.timeline import compact
+
+DEFAULT_SHARD_SIZE = 64 << 20   # files larger than this are split into byte ranges
+DEFAULT_MIN_POOL_BYTES = 16 << 20   # with workers=None, less input than this is parsed in-process
+
+
+# ----- Shard readers -----
+class _ShardReader:
+    """Binary reader over `[start, end)` of a stream."""
+
+    def __init__(self, raw, start, end):
+        self.raw = raw
+        self.raw.seek(start)
+        self.remaining = end - start
+
+    def read(self, size):
+        data = self.raw.read(min(size, self.remaining))
+        self.remaining -= len(data)
+        return data
+
+
+def _parse_shard(name, source, start, end):
+    """Parse one byte range of a file (in a worker process or in-process).
+
+    `source` is a file path, or the file content itself for uploads that
+    only exist in memory. Error line numbers are relative to the shard.
+    """
+    if isinstance(source, bytes):
+        raw = io.BytesIO(source)
+    else:
+        raw = open(source, "rb")
+    with raw:
+        return parse_log_stream(_ShardReader(raw, start, end), name)
+
+
+# ----- Sharding -----
+def _next_line_start(raw, offset, size):
+    """First byte offset at or after `offset` that starts a new line."""
+    pos = offset - 1
+    raw.seek(pos)
+    while pos < size:
+        data = raw.read(1 << 16)
+        if not data:
+            break
+        newline = data.find(b"\n")
+        if newline >= 0:
+            return pos + newline + 1
+        pos += len(data)
+    return size
+
+
+def _shards(source, shard_size):
+    """Split one source into `(name, source, start, end)` ranges cut at line boundaries.
+
+    Paths are passed to the workers as paths; in-memory uploads are passed
+    as the bytes of each range only.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        name, path = os.path.basename(source), os.fspath(source)
+        size = os.path.getsize(path)
+        raw = open(path, "rb")
+    else:
+        # an uploaded file (Streamlit UploadedFile or any named BytesIO)
+        name, path, data = source.name, None, source.getvalue()
+        size = len(data)
+        raw = io.BytesIO(data)
+    with raw:
+        bounds = [0]
+        while bounds[-1] + shard_size < size:
+            bounds.append(_next_line_start(raw, bounds[-1] + shard_size, size))
+    bounds.append(size)
+    ranges = [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start] or [(0, 0)]
+    if path is not None:
+        return [(name, path, start, end) for start, end in ranges]
+    return [(name, data[start:end], 0, end - start) for start, end in ranges]
+
+
+# ----- Merge -----
+def _merge(owners, results):
+    """Combine shard results in input order into one sorted, compact timeline.
+
+    `owners[i]` is the index of the source shard `i` was cut from; error line
+    numbers are shifted by the lines of the earlier shards of that source.
+    Error records are capped per source, so one corrupt file cannot crowd
+    out the records of the others.
+    """
+    frames = []
+    summary_stats = {}
+    file_errors = {}
+    line_offset = {}
+    for owner, (df, errors, line_count) in zip(owners, results):
+        offset = line_offset.get(owner, 0)
+        file_errors.setdefault(owner, ErrorLines()).merge(errors, offset)
+        line_offset[owner] = offset + line_count
+        if df.empty:
+            continue
+        frames.append(df)
+        for short, count in df["ShortType"].value_counts(sort=False).items():
+            if count:   # categorical columns also list unused categories
+                summary_stats[short] = summary_stats.get(short, 0) + count
+    error_lines = ErrorLines(limit=DEFAULT_ERROR_LIMIT * len(file_errors))
+    for errors in file_errors.values():
+        error_lines.merge(errors)
+
+    if not frames:
+        return pd.DataFrame(), summary_stats, error_lines
+    df_logs = compact(pd.concat(frames, ignore_index=True)).sort_values("Timestamp", kind="stable")
+    return df_logs, summary_stats, error_lines
+
+
+def _combine(results):
+    """One `(df, errors, line_count)` result for a file from the results of its shards."""
+    frames = [df for df, _, _ in results if not df.empty]
+    error_lines = ErrorLines()
+    lines = 0
+    for _, errors, line_count in results:
+        error_lines.merge(errors, lines)
+        lines += line_count
+    df = compact(pd.concat(frames, ignore_index=True)) if frames else pd.DataFrame()
+    return df, error_lines, lines
+
+
+def ingest(sources, workers=None, shard_size=DEFAULT_SHARD_SIZE, cache=None, profiler=None,
+           min_pool_bytes=DEFAULT_MIN_POOL_BYTES):
+    """Parse many `.vlog` files into one timeline sorted by `Timestamp`.
+
+    `sources` are file paths or uploaded file objects. Every file is cut into
+    byte-range shards of about `shard_size` bytes at line boundaries, and the
+    shards are parsed by a pool of `workers` processes. With `workers=None`
+    (or 0) the pool uses all cores, but input smaller than `min_pool_bytes`
+    in total is parsed in-process, where starting processes would cost more
+    than it saves. An explicit `workers > 1` always uses a pool when there is
+    more than one shard, so many small files are parsed in parallel too; 1
+    parses in-process. Results are merged in input order, so the output is
+    the same for every pool size.
+
+    With a `cache.ParseCache`, every file is looked up by content first and
+    only files not seen before are parsed; the merged result is cached too.
+    A `profiling.Profiler` records the cache lookup, "parse" and "merge_sort"
+    stages.
+
+    Returns `(df_logs, summary_stats, error_lines)`: the merged timeline
+    (see `timeline` for its compact schema), event counts per ShortType, and an
+    `ErrorLines` of the malformed lines, numbered per file (the first
+    `DEFAULT_ERROR_LIMIT` of every file as records, all of them in its
+    per-class counts).
+    """
+    sources = list(sources)
+    profiler = profiler or NULL_PROFILER
+    cached = {}
+    if cache is not None:
+        with profiler.stage("cache_lookup", rows_in=len(sources)) as stage:
+            keys = [cache.source_key(source) for source in sources]
+            merged_key = "merged-" + hashlib.blake2b("\n".join(keys).encode(), digest_size=20).hexdigest()
+            entry = cache.get(merged_key)
+            if entry is not None:
+                df_logs, meta = entry
+                stage.rows_out = len(df_logs)
+                return df_logs, meta["summary_stats"], ErrorLines(meta["error_lines"], meta.get("error_counts"))
+            for owner, key in enumerate(keys):
+                entry = cache.get(key)
+                if entry is not None:
+                    errors = ErrorLines(entry[1]["error_lines"], entry[1].get("error_counts"))
+                    cached[owner] = (entry[0], errors, entry[1]["line_count"])
+            stage.rows_out = sum(len(df) for df, _, _ in cached.values())
+
+    shards = []
+    owners = []
+    for owner, source in enumerate(sources):
+        if owner in cached:
+            continue
+        for shard in _shards(source, shard_size):
+            shards.append(shard)
+            owners.append(owner)
+
+    automatic = not workers
+    workers = workers or os.cpu_count() or 1
+    total_bytes = sum(end - start for _, _, start, end in shards)
+    with profiler.stage("parse") as stage:
+        if workers == 1 or len(shards) <= 1 or (automatic and total_bytes < min_pool_bytes):
+            # nothing to split, or too little input to be worth starting processes
+            results = [_parse_shard(*shard) for shard in shards]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+                results = list(pool.map(_parse_shard, *zip(*shards)))
+        stage.rows_in = sum(line_count for _, _, line_count in results)
+        stage.rows_out = sum(len(df) for df, _, _ in results)
+    merge_rows = stage.rows_out + sum(len(df) for df, _, _ in cached.values())
+
+    with profiler.stage("merge_sort", rows_in=merge_rows) as stage:
+        if cache is None:
+            df_logs, summary_stats, error_lines = _merge(owners, results)
+            stage.rows_out = len(df_logs)
+            return df_logs, summary_stats, error_lines
+
+        parsed = {}
+        for owner, result in zip(owners, results):
+            parsed.setdefault(owner, []).append(result)
+        for owner, file_results in parsed.items():
+            df, error_lines, line_count = cached[owner] = _combine(file_results)
+            cache.put(keys[owner], df, {"error_lines": list(error_lines), "error_counts": error_lines.counts,
+                                        "line_count": line_count})
+        owners = sorted(cached)
+        df_logs, summary_stats, error_lines = _merge(owners, [cached[owner] for owner in owners])
+        cache.put(merged_key, df_logs, {"summary_stats": summary_stats, "error_lines": list(error_lines),
+                                        "error_counts": error_lines.counts})
+        stage.rows_out = len(df_logs)
+    return df_logs, summary_stats, error_lines
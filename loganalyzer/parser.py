@@ -0,0 +1,568 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # the columnar parser falls back to line-by-line parsing
+    pa = None
+
+# ----- Log grammar -----
+LOG_PATTERN = re.compile(r"(0x[0-9A-F]+)\[ts:(\d+)\]\|EVNT:(\S+)!@(.+)")
+
+# Columnar version of the same grammar, run by Arrow's RE2 engine over a whole
+# block of raw lines. It only accepts the plain-ASCII shape real logs have: no
+# "!" apart from the "!@" separator, printable characters, and at most ASCII
+# whitespace at the end of the line, so it can never disagree with LOG_PATTERN
+# on a stripped line. Anything else is parsed line by line instead. (Payloads
+# ending in a space are sent down the slow path too; matching them here would
+# make the pattern ambiguous and several times slower.)
+_FAST_LINE_PATTERN = (
+    r"^(?P<index>0x[0-9A-F]+)\[ts:(?P<ts>[0-9]{1,18})\]\|EVNT:(?P<event>[\x22-\x7e]+)"
+    r"!@(?P<payload>[\x20\x22-\x7e]+)[\t\n\x0b\x0c\r]*$"
+)
+# The payload rules of LogEntry for the payloads accepted above: "<head>:<field>"
+# followed by "=><path>" (path without "="), by ":<anything>" or by nothing.
+# That makes `field` exactly `payload.split(":")[1]`, and after "=>" `path` is
+# the only other half of `payload.split("=>")`. Both patterns are unambiguous
+# and have at most four groups, which keeps RE2 on its fast one-pass matcher.
+_FAST_PAYLOAD_PATTERN = (
+    r"^[\x20\x22-\x39\x3b\x3c\x3e-\x7e]*:(?P<field>[\x20\x22-\x39\x3b\x3c\x3e-\x7e]*)"
+    r"(?:(?P<arrow>=>)(?P<path>[\x20\x22-\x3c\x3e-\x7e]*)|:[\x20\x22-\x7e]*)?$"
+)
+_PAYLOAD_COLUMNS = ["user", "path", "ip", "pid", "error"]
+
+DEFAULT_CHUNK_SIZE = 4 << 20    # bytes read from the file per chunk (one columnar block)
+DEFAULT_BATCH_SIZE = 50_000     # parsed lines handed out per batch
+DEFAULT_ERROR_LIMIT = 1000      # malformed lines kept as full records per parse; the rest are only counted
+MAX_LINE_BYTES = 1 << 16        # longer lines are cut here when they span chunks (no log line comes close)
+ERROR_LINE_CHARS = 1000         # text of a malformed line kept in its error record
+MIN_COLUMNAR_LINES = 400        # smaller blocks are parsed line by line (Arrow's fixed cost per block is higher)
+PARSER_VERSION = "3"            # bump when parsed output changes (invalidates cached parses)
+
+# Error classes of malformed lines
+PATTERN_MISMATCH = "Pattern mismatch"
+INVALID_UTF8 = "Invalid UTF-8"
+
+# Lines that can never match LOG_PATTERN once stripped: the first character
+# is neither whitespace nor "0", or it is a "0" not followed by "x", or one
+# of the literal parts of the grammar is missing. Checked by Arrow over the
+# lines the fast pattern rejects, so garbage is turned away without a Python
+# string or a regex call per line.
+_REJECT_PATTERN = r"^(?:[^\t\n\x0b\x0c\r\x1c-\x20\x85\p{Z}0]|0[^x])"
+_REQUIRED_LITERALS = ["[ts:", "]|EVNT:", "!@"]
+
+# A whole line of valid UTF-8. Arrow runs regexes over binary arrays byte by
+# byte, so this finds the undecodable lines of a block without Python.
+_UTF8_LINE = (
+    rb"^(?:[\x00-\x7f]|[\xc2-\xdf][\x80-\xbf]|\xe0[\xa0-\xbf][\x80-\xbf]|[\xe1-\xec\xee\xef][\x80-\xbf]{2}"
+    rb"|\xed[\x80-\x9f][\x80-\xbf]|\xf0[\x90-\xbf][\x80-\xbf]{2}|[\xf1-\xf3][\x80-\xbf]{3}"
+    rb"|\xf4[\x80-\x8f][\x80-\xbf]{2})*$"
+)
+# `_REJECT_PATTERN` for the raw bytes of such a line: its first byte is an
+# ASCII character that is neither whitespace nor "0", or it is a "0" not
+# followed by "x", so it cannot match whatever the rest decodes to.
+_REJECT_BYTES = rb"^(?:[\x00-\x08\x0e-\x1b\x21-\x2f\x31-\x7f]|0[^x])"
+_REPLACEMENT = "\ufffd".encode()
+
+# Line breaks of `str.splitlines` besides "\n", as bytes ("\r\n" before "\r")
+_LINE_BREAKS = (b"\r\n", b"\r", b"\x0b", b"\x0c", b"\x1c", b"\x1d", b"\x1e")
+_UTF8_LINE_BREAKS = (b"\xc2\x85", b"\xe2\x80\xa8", b"\xe2\x80\xa9")    # U+0085, U+2028, U+2029
+
+
+# ----- LogEntry class definition -----
+class LogEntry:
+    def __init__(self, index, timestamp, event_type, payload_raw, file_source="unknown"):
+        self.index = index
+        self.timestamp = int(timestamp)
+        self.event_type = event_type
+        self.payload_raw = payload_raw
+        self.short_type = event_type.split("-")[-1]
+        self.payload_data = self._parse_payload(payload_raw)
+        self.source_file = file_source
+
+    def _parse_payload(self, payload):
+        try:
+            if self.short_type == "CONN":
+                return {"ip": payload.split(":")[1]}
+            elif self.short_type == "SHDW":
+                return {"pid": int(payload.split(":")[1].replace("pid", ""))}
+            else:
+                user, path = payload.split("=>")
+                return {
+                    "user": user.split(":")[1],
+                    "path": path
+                }
+        except Exception:
+            return {"error": "Malformed payload"}
+
+    def to_dict(self):
+        return {
+            "File": self.source_file,
+            "Index": self.index,
+            "Timestamp": self.timestamp,
+            "EventType": self.event_type,
+            "ShortType": self.short_type,
+            "PayloadRaw": self.payload_raw,
+            **self.payload_data  # Merge parsed payload fields
+        }
+
+
+# ----- Malformed lines -----
+class ErrorLines(list):
+    """Error records of malformed lines, capped at `limit`, plus counts per error class.
+
+    The list holds the records of the first `limit` malformed lines in line
+    order; `counts` maps every error class to the number of lines that failed
+    with it, kept or not, so a mostly corrupt file costs counters rather
+    than one dict per line.
+    """
+
+    def __init__(self, records=(), counts=None, limit=DEFAULT_ERROR_LIMIT):
+        super().__init__(records)
+        self.limit = limit
+        if counts is None:
+            counts = {}
+            for record in self:
+                counts[record["Error"]] = counts.get(record["Error"], 0) + 1
+        self.counts = dict(counts)
+
+    @property
+    def total(self):
+        """Number of malformed lines, kept or not."""
+        return sum(self.counts.values())
+
+    def count(self, error, lines=1):
+        """Count malformed lines without keeping a record of them."""
+        self.counts[error] = self.counts.get(error, 0) + lines
+
+    def add(self, filename, line_number, line, error):
+        """Count one malformed line and keep its record while there is room."""
+        self.count(error)
+        if len(self) < self.limit:
+            self.append({
+                "File": filename,
+                "LineNumber": line_number,
+                "Line": line[:ERROR_LINE_CHARS],
+                "Error": error
+            })
+
+    def merge(self, other, line_offset=0):
+        """Append the records and counts of `other`, shifting its line numbers by `line_offset`."""
+        for record in other[:max(self.limit - len(self), 0)]:
+            self.append({**record, "LineNumber": record["LineNumber"] + line_offset})
+        for error, lines in other.counts.items():
+            self.count(error, lines)
+
+
+def _error_class(line):
+    """Error class of a line that did not parse."""
+    # bad bytes were decoded to U+FFFD, so the line was never valid text
+    return INVALID_UTF8 if "\ufffd" in line else PATTERN_MISMATCH
+
+
+# ----- Line reader -----
+def _decode(raw):
+    """A raw line as text; invalid UTF-8 is replaced, so it only spoils its own line."""
+    return raw.decode("utf-8", "replace")
+
+
+def normalize_line_breaks(data):
+    """`data` with every line break `str.splitlines` knows turned into "\\n".
+
+    That is "\\r\\n", "\\r", "\\v", "\\f", "\\x1c"-"\\x1e" and the UTF-8 of
+    U+0085, U+2028 and U+2029. Their bytes can only ever stand for those
+    characters, so this splits a block exactly where decoding it and calling
+    `splitlines()` would. Blocks without them (nearly all) are only scanned.
+    """
+    for line_break in _LINE_BREAKS if data.isascii() else _LINE_BREAKS + _UTF8_LINE_BREAKS:
+        if line_break in data:
+            data = data.replace(line_break, b"\n")
+    return data
+
+
+def _open_break(data):
+    """Length of the tail of `data` that the next chunk could still turn into a line break."""
+    if data.endswith(b"\xe2\x80"):
+        return 2
+    if data.endswith((b"\r", b"\xc2", b"\xe2")):
+        return 1
+    return 0
+
+
+def complete_lines(data):
+    """Split raw bytes into `(block, rest)` at the last line break that is certain.
+
+    `block` holds the complete lines like a block of `iter_blocks` (line
+    breaks normalized, the last one dropped), or is None when `data` has
+    none; `rest` is the raw, unfinished tail, to be completed by whatever
+    gets read next.
+    """
+    cut = len(data) - _open_break(data)
+    block, newline, tail = normalize_line_breaks(data[:cut]).rpartition(b"\n")
+    if not newline:
+        return None, data
+    return block, data[cut - len(tail):]
+
+
+def iter_lines(stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield decoded lines from a binary stream, reading it in fixed-size chunks.
+
+    Lines end where `str.splitlines` would end them. A line cut in half by a
+    chunk boundary is carried over and completed by the next chunk, so only
+    one chunk (plus one partial line) is held at once.
+    """
+    for block in iter_blocks(stream, chunk_size):
+        for raw in block.split(b"\n"):
+            yield _decode(raw)
+
+
+def iter_blocks(stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield blocks of whole lines (without the final line break) from a binary stream.
+
+    Same chunking as `iter_lines`, but each chunk is handed out as one bytes
+    object cut at its last line break, with every line break turned into
+    "\\n" (see `normalize_line_breaks`), for the columnar parser. A line still
+    unfinished after `MAX_LINE_BYTES` (binary data without line breaks) is
+    cut there and the rest of it is skipped, so it still counts as one line
+    but is never held whole.
+    """
+    carry = b""     # start of the unfinished last line, line breaks already normalized
+    held = b""      # raw bytes at the end of the last chunk that may be half a line break
+    skipping = False
+    while True:
+        chunk = stream.read(chunk_size)
+        data = held + chunk
+        cut = len(data) - _open_break(data) if chunk else len(data)
+        data, held = normalize_line_breaks(data[:cut]), data[cut:]
+        if skipping:
+            newline = data.find(b"\n")
+            if newline >= 0:
+                data = data[newline:]
+                skipping = False
+            else:
+                data = b""
+        block, newline, carry = (carry + data).rpartition(b"\n")
+        if newline:
+            yield block
+        if not chunk:
+            break
+        if len(carry) > MAX_LINE_BYTES:
+            carry = carry[:MAX_LINE_BYTES]
+            skipping = True
+    if carry:
+        yield carry
+
+
+# ----- Parser Functions -----
+def _match_line(line, filename):
+    """Record dict for one stripped log line, or None if it does not match."""
+    # cheap prefix check first: most garbage never reaches the regex
+    match = LOG_PATTERN.match(line) if line[:2] == "0x" else None
+    if match is None:
+        return None
+    idx, ts, event, payload = match.groups()
+    return LogEntry(idx, ts, event, payload, file_source=filename).to_dict()
+
+
+def parse_line(line, filename):
+    """Parse one log line into a record dict, or raise ValueError."""
+    entry = _match_line(line, filename)
+    if entry is None:
+        raise ValueError(PATTERN_MISMATCH)
+    return entry
+
+
+def parse_log_lines(lines, filename, start=1, error_limit=DEFAULT_ERROR_LIMIT):
+    """Parse lines into a list of record dicts plus an `ErrorLines` of the malformed ones."""
+    parsed_entries = []
+    error_lines = ErrorLines(limit=error_limit)
+
+    for i, line in enumerate(lines, start):
+        line = line.strip()
+        entry = _match_line(line, filename)
+        if entry is None:
+            error_lines.add(filename, i, line, _error_class(line))
+        else:
+            parsed_entries.append(entry)
+
+    return parsed_entries, error_lines
+
+
+# ----- Columnar parser -----
+def _to_frame(columns):
+    """Arrow columns -> DataFrame with the dtypes a list of dicts would get."""
+    df = pa.table(columns).to_pandas()
+    for name in df.columns[df.dtypes == object]:
+        df[name] = df[name].where(df[name].notna(), np.nan).infer_objects()
+    return df
+
+
+def _column_order(first_seen):
+    """Column names of a parsed block; payload columns in the order their keys are first seen.
+
+    `first_seen` maps each payload column present to the row it first has a value in.
+    """
+    names = ["File", "Index", "Timestamp", "EventType", "ShortType", "PayloadRaw"]
+    return names + sorted(first_seen, key=lambda name: (first_seen[name], _PAYLOAD_COLUMNS.index(name)))
+
+
+def _fast_parse(lines):
+    """Run the fast pattern over an Arrow array of raw lines.
+
+    Returns the positions of the lines it fully accepts, and the parsed
+    columns for exactly those lines.
+    """
+    fields = pc.extract_regex(lines, _FAST_LINE_PATTERN)
+    matched = np.flatnonzero(_bools(pc.is_valid(fields)))
+    fields = fields.take(pa.array(matched))
+    payload = fields.field("payload")
+    parts = pc.extract_regex(payload, _FAST_PAYLOAD_PATTERN)
+    field, arrow, _ = parts.flatten()
+
+    # a block holds only a handful of event types: split each one once
+    events = pc.dictionary_encode(fields.field("event"))
+    codes = events.indices.to_numpy(zero_copy_only=False)
+    shorts = [name.split("-")[-1] for name in events.dictionary.to_pylist()]
+    is_conn = np.array([name == "CONN" for name in shorts], dtype=bool)[codes]
+    is_shdw = np.array([name == "SHDW" for name in shorts], dtype=bool)[codes]
+    arrow = _bools(pc.equal(arrow, "=>"))
+    # CONN: "IP:<ip>", SHDW: "KILL_proc:pid<n>", everything else: "<action>_usr:<user>=><path>"
+    conn_ok = is_conn & ~arrow
+    shdw_ok = is_shdw & ~arrow & _bools(pc.match_substring_regex(field, r"^pid[0-9]{1,18}$"))
+    other_ok = ~(is_conn | is_shdw) & arrow
+    ok = (conn_ok | shdw_ok | other_ok) & _bools(pc.is_valid(parts)) & ~_bools(pc.ends_with(payload, " "))
+
+    rows = pa.array(np.flatnonzero(ok))
+    idx, ts, event, payload = fields.take(rows).flatten()
+    field, _, path = parts.take(rows).flatten()
+
+    def only(mask, column):
+        return pc.if_else(pa.array(mask[ok]), column, pa.scalar(None, column.type))
+
+    columns = {
+        "Index": idx,
+        "Timestamp": pc.cast(ts, pa.int64()),
+        "EventType": event,
+        "ShortType": pa.array(shorts, pa.string()).take(events.indices.take(rows)),
+        "PayloadRaw": payload,
+        "user": only(other_ok, field),
+        "path": only(other_ok, path),
+        "ip": only(conn_ok, field),
+        "pid": pc.cast(only(shdw_ok, pc.utf8_slice_codeunits(field, 3)), pa.int64()),
+    }
+    return matched[ok], columns
+
+
+def _bools(array):
+    """Arrow boolean array -> NumPy bool array."""
+    return array.to_numpy(zero_copy_only=False).astype(bool, copy=False)
+
+
+def _slow_parse(lines, slow_rows, filename, start, error_limit, raw=None):
+    """Line-by-line parse of the rows the fast patterns did not accept.
+
+    Rows `_REJECT_PATTERN` and `_REQUIRED_LITERALS` rule out are counted as errors in Arrow; only the
+    rest are parsed in Python, and only the first `error_limit` malformed
+    lines get a record. With `raw` (the binary lines `_decode_lines` made
+    `lines` from), record texts are decoded from it. Returns
+    `(entries by row, ErrorLines)`.
+    """
+    slow_lines = lines.take(pa.array(slow_rows))
+    failed = pc.match_substring_regex(slow_lines, _REJECT_PATTERN)
+    for literal in _REQUIRED_LITERALS:
+        failed = pc.or_(failed, pc.invert(pc.match_substring(slow_lines, literal)))
+    failed = _bools(failed)
+    checked = np.flatnonzero(~failed)
+    slow_entries = {}
+    for i, line in zip(checked, slow_lines.take(pa.array(checked)).to_pylist()):
+        entry = _match_line(line.strip(), filename)
+        if entry is None:
+            failed[i] = True
+        else:
+            slow_entries[slow_rows[i]] = entry
+
+    error_lines = ErrorLines(limit=error_limit)
+    failed = np.flatnonzero(failed)
+    if len(failed):
+        invalid = _bools(pc.match_substring(slow_lines.take(pa.array(failed)), "\ufffd"))
+        kept = failed[:error_limit]
+        if raw is None:
+            texts = slow_lines.take(pa.array(kept)).to_pylist()
+        else:
+            texts = [_decode(line) for line in raw.take(pa.array(slow_rows[kept])).to_pylist()]
+        for i, line, bad in zip(kept, texts, invalid):
+            error_lines.add(filename, start + int(slow_rows[i]), line.strip(), INVALID_UTF8 if bad else PATTERN_MISMATCH)
+        # the rest are only counted
+        rest = invalid[len(kept):]
+        for error, lines in ((INVALID_UTF8, int(rest.sum())), (PATTERN_MISMATCH, int(len(rest) - rest.sum()))):
+            if lines:
+                error_lines.count(error, lines)
+    return slow_entries, error_lines
+
+
+def _parse_arrow_lines(lines, filename, start, error_limit=DEFAULT_ERROR_LIMIT, raw=None):
+    """Columnar parse of an Arrow string array of raw (unstripped) lines."""
+    n = len(lines)
+    positions, fast = _fast_parse(lines)
+
+    slow = np.ones(n, dtype=bool)
+    slow[positions] = False
+    slow_rows = np.flatnonzero(slow)
+    if len(slow_rows):
+        slow_entries, error_lines = _slow_parse(lines, slow_rows, filename, start, error_limit, raw)
+    else:
+        slow_entries, error_lines = {}, ErrorLines(limit=error_limit)
+
+    if not slow_entries:
+        # common case: every record came from the fast path, stay in Arrow
+        if not len(positions):
+            return pd.DataFrame(), error_lines
+        data = {"File": pa.repeat(filename, len(positions))}
+        data.update(fast)
+        data = {name: column for name, column in data.items() if column.null_count < len(column)}
+        first_seen = {name: np.argmax(_bools(pc.is_valid(data[name]))) for name in _PAYLOAD_COLUMNS if name in data}
+        return _to_frame({name: data[name] for name in _column_order(first_seen)}), error_lines
+    else:
+        # merge the line-by-line records back in line order
+        keep = ~slow
+        keep[list(slow_entries)] = True
+        data = {"File": np.full(n, filename, dtype=object)}
+        for name, column in fast.items():
+            values = np.full(n, np.nan, dtype=object)
+            values[positions] = column.to_numpy(zero_copy_only=False)
+            data[name] = values
+        data["error"] = np.full(n, np.nan, dtype=object)
+        for row, entry in slow_entries.items():
+            for key, value in entry.items():
+                data[key][row] = value
+        # let pandas pick the same dtypes it infers for a list of dicts
+        series = {name: pd.Series(values[keep]).infer_objects() for name, values in data.items()}
+        series = {name: column for name, column in series.items() if column.notna().any()}
+
+    if not len(series.get("File", ())):
+        return pd.DataFrame(), error_lines
+    first_seen = {name: series[name].notna().to_numpy().argmax() for name in _PAYLOAD_COLUMNS if name in series}
+    return pd.DataFrame({name: series[name] for name in _column_order(first_seen)}), error_lines
+
+
+def parse_lines_columnar(lines, filename, start=1, error_limit=DEFAULT_ERROR_LIMIT):
+    """Parse a whole block of lines at once into a DataFrame plus error lines.
+
+    The result is the same frame that `pd.DataFrame(parse_log_lines(...)[0])`
+    builds, but the grammar and payload rules run as Arrow compute kernels
+    over the whole block and the columns are written straight from Arrow
+    arrays. Lines the fast patterns do not accept go through `parse_line`, so
+    odd input is judged by exactly the same rules as before. Blocks of fewer
+    than `MIN_COLUMNAR_LINES` lines are parsed line by line.
+    """
+    if pa is None or len(lines) < MIN_COLUMNAR_LINES:
+        entries, error_lines = parse_log_lines(lines, filename, start, error_limit)
+        return pd.DataFrame(entries), error_lines
+    if not lines:
+        return pd.DataFrame(), ErrorLines(limit=error_limit)
+    return _parse_arrow_lines(pa.array(lines, pa.string()), filename, start, error_limit)
+
+
+def _decode_lines(raw_lines):
+    """String array of binary lines some of which are not valid UTF-8.
+
+    Only those lines are decoded in Python (with replacement, like
+    `iter_lines`), and only when they could still match the grammar; the
+    others become a lone U+FFFD, which is all it takes to count them as
+    "Invalid UTF-8". Their error records are decoded from the raw lines.
+    """
+    invalid = np.flatnonzero(~_bools(pc.match_substring_regex(raw_lines, _UTF8_LINE)))
+    bad = raw_lines.take(pa.array(invalid))
+    hopeless = pc.match_substring_regex(bad, _REJECT_BYTES)
+    for literal in _REQUIRED_LITERALS:
+        hopeless = pc.or_(hopeless, pc.invert(pc.match_substring(bad, literal)))
+    mask = np.zeros(len(raw_lines), dtype=bool)
+    mask[invalid] = True
+    lines = pc.if_else(pa.array(mask), pa.scalar(_REPLACEMENT, pa.binary()), raw_lines)
+    decodable = np.flatnonzero(~_bools(hopeless))
+    if len(decodable):
+        mask[:] = False
+        mask[invalid[decodable]] = True
+        texts = [_decode(line).encode() for line in bad.take(pa.array(decodable)).to_pylist()]
+        lines = pc.replace_with_mask(lines, pa.array(mask), pa.array(texts, pa.binary()))
+    return lines.cast(pa.string())
+
+
+def parse_block_columnar(block, filename, start=1, error_limit=DEFAULT_ERROR_LIMIT):
+    """Like `parse_lines_columnar`, for a bytes block of newline-separated lines.
+
+    The block is split and decoded by Arrow, so no Python string is created
+    for a line unless it has to take the line-by-line path. Invalid UTF-8 is
+    replaced like `iter_lines` does, so it only spoils the lines it is in,
+    and only those lines are ever decoded in Python (see `_decode_lines`).
+    """
+    if pa is None:
+        return parse_lines_columnar([_decode(raw) for raw in block.split(b"\n")], filename, start, error_limit)
+    raw_lines = pc.split_pattern(pa.array([block], pa.binary()), b"\n").flatten()
+    if len(raw_lines) < MIN_COLUMNAR_LINES:
+        return parse_lines_columnar([_decode(raw) for raw in raw_lines.to_pylist()], filename, start, error_limit)
+    try:
+        lines = raw_lines.cast(pa.string())
+    except pa.ArrowInvalid:
+        return _parse_arrow_lines(_decode_lines(raw_lines), filename, start, error_limit, raw_lines)
+    return _parse_arrow_lines(lines, filename, start, error_limit)
+
+
+def iter_log_batches(stream, filename, batch_size=DEFAULT_BATCH_SIZE, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream a `.vlog` file and yield `(entries, errors)` per batch of lines.
+
+    Line numbers in the error reports keep counting across batches, so they
+    match the line numbers of the whole file.
+    """
+    batch = []
+    start = 1
+    for line in iter_lines(stream, chunk_size):
+        batch.append(line)
+        if len(batch) >= batch_size:
+            yield parse_log_lines(batch, filename, start)
+            start += len(batch)
+            batch = []
+    if batch:
+        yield parse_log_lines(batch, filename, start)
+
+
+def iter_log_frames(stream, filename, chunk_size=DEFAULT_CHUNK_SIZE, error_limit=DEFAULT_ERROR_LIMIT):
+    """Stream a `.vlog` file and yield `(DataFrame, errors)` per chunk of lines.
+
+    Each chunk is parsed by the columnar parser; line numbers in the error
+    reports keep counting across chunks.
+    """
+    start = 1
+    for block in iter_blocks(stream, chunk_size):
+        yield parse_block_columnar(block, filename, start, error_limit)
+        start += block.count(b"\n") + 1
+
+
+def parse_log_stream(stream, filename, chunk_size=DEFAULT_CHUNK_SIZE, error_limit=DEFAULT_ERROR_LIMIT):
+    """`parse_log_file`, plus the number of lines read: `(df, errors, line_count)`."""
+    frames = []
+    all_errors = ErrorLines(limit=error_limit)
+    line_count = 0
+    for block in iter_blocks(stream, chunk_size):
+        df, errors = parse_block_columnar(block, filename, line_count + 1, error_limit)
+        line_count += block.count(b"\n") + 1
+        if not df.empty:
+            frames.append(df)
+        all_errors.merge(errors)
+    if len(frames) == 1:
+        return frames[0], all_errors, line_count
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return df, all_errors, line_count
+
+
+def parse_log_file(stream, filename, chunk_size=DEFAULT_CHUNK_SIZE, error_limit=DEFAULT_ERROR_LIMIT):
+    """Parse a whole `.vlog` stream into a DataFrame plus the `ErrorLines` of the file.
+
+    Chunks are parsed straight into DataFrames by the columnar parser, so raw
+    lines only exist for one chunk at a time.
+    """
+    df, all_errors, _ = parse_log_stream(stream, filename, chunk_size, error_limit)
+    return df, all_errors
@@ -0,0 +1,47 @@
+import pandas as pd
+
+from loganalyzer.categorize import CATEGORY_MAP, categorize
+from loganalyzer.ingest import ingest
+from loganalyzer.profiling import NULL_PROFILER
+from loganalyzer.rules import ANOMALY_COLUMNS, DEFAULT_RULES, DESCRIPTIONS, detect_anomalies
+
+
+class PipelineResult:
+    """Output of `run_pipeline`."""
+
+    def __init__(self, timeline, summary_stats, error_lines, anomalies):
+        self.timeline = timeline
+        self.summary_stats = summary_stats
+        self.error_lines = error_lines
+        self.anomalies = anomalies
+
+
+def run_pipeline(sources, workers=None, rules=None, descriptions=DESCRIPTIONS, ruleset=DEFAULT_RULES,
+                 category_map=CATEGORY_MAP, cache=None, profiler=None, scorer=None):
+    """Parse -> categorize -> detect over `.vlog` paths or uploads, without any UI.
+
+    The same steps the Day 2, Day 3 and Day 4 pages run one after the other.
+    Pass `category_map=None` to leave out the "Category" column, a
+    `scoring.AnomalyScorer` to add its z-score / Isolation Forest hits to
+    the anomaly table, and a `profiling.Profiler` to time every stage.
+    """
+    profiler = profiler or NULL_PROFILER
+    timeline, summary_stats, error_lines = ingest(sources, workers=workers, cache=cache, profiler=profiler)
+    if timeline.empty:
+        return PipelineResult(timeline, summary_stats, error_lines, pd.DataFrame(columns=ANOMALY_COLUMNS))
+    if category_map is not None:
+        with profiler.stage("categorize", rows_in=len(timeline)) as stage:
+            timeline = categorize(timeline, category_map)
+            stage.rows_out = len(timeline)
+    with profiler.stage("detect", rows_in=len(timeline)) as stage:
+        if cache is not None:
+            anomalies = cache.detect_anomalies(sources, timeline, rules, descriptions, ruleset)
+        else:
+            anomalies = detect_anomalies(timeline, rules, descriptions, ruleset)
+        stage.rows_out = len(anomalies)
+    if scorer is not None:
+        with profiler.stage("score", rows_in=len(timeline)) as stage:
+            scored = scorer.score(timeline)
+            stage.rows_out = len(scored)
+        anomalies = pd.concat([anomalies, scored], ignore_index=True) if not scored.empty else anomalies
+    return PipelineResult(timeline, summary_stats, error_lines, anomalies)
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Export formats: extension -> MIME type
+PLOT_FORMATS = {"png": "image/png", "html": "text/html"}
+PNG_OPTIONS = {"width": 1000, "height": 600}
+
+
+def _render(fig, fmt, options):
+    if fmt == "html":
+        return fig.to_html(full_html=False).encode("utf-8")
+    return fig.to_image(format=fmt, **options)
+
+
+class PlotExporter:
+    """Renders Plotly figures to PNG/HTML bytes on demand, in a thread pool, cached by content.
+
+    A figure is identified by a hash of its JSON, the format and the render
+    options, so the same chart on the next rerun (or in another session)
+    gets the bytes rendered the first time. Nothing is rendered until
+    somebody asks for it. The `max_entries` most recent renders are kept.
+    """
+
+    def __init__(self, max_workers=4, max_entries=64):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="plot-export")
+        self.max_entries = max_entries
+        self.renders = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def figure_key(fig, fmt, options):
+        digest = hashlib.blake2b(fig.to_json().encode("utf-8"), digest_size=20)
+        digest.update(json.dumps([fmt, options], sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def submit(self, fig, fmt="png", **options):
+        """Future for the bytes of `fig` as `fmt`; starts rendering only if not cached."""
+        options = {**PNG_OPTIONS, **options} if fmt != "html" else {}
+        key = self.figure_key(fig, fmt, options)
+        with self._lock:
+            future = self.renders.get(key)
+            if future is not None and not (future.done() and future.exception() is not None):
+                self.renders.move_to_end(key)
+                return future
+            future = self.pool.submit(_render, fig, fmt, options)
+            self.renders[key] = future
+            while len(self.renders) > self.max_entries:
+                self.renders.popitem(last=False)
+        return future
+
+    def render(self, fig, fmt="png", **options):
+        """Bytes of `fig` as `fmt` (waits for the render)."""
+        return self.submit(fig, fmt, **options).result()
+
+    def render_all(self, figures, formats=("png", "html"), **options):
+        """Render every `{name: figure}` in every format concurrently.
+
+        Returns `{"name.ext": bytes}` in the order of `figures` and `formats`.
+        """
+        futures = {
+            f"{name}.{fmt}": self.submit(fig, fmt, **options)
+            for name, fig in figures.items()
+            for fmt in formats
+        }
+        return {filename: future.result() for filename, future in futures.items()}
+
+    def write_zip(self, zipf, figures, formats=("png", "html"), folder="plots/", **options):
+        """Render `figures` concurrently and add them to an open `ZipFile` under `folder`."""
+        for filename, data in self.render_all(figures, formats, **options).items():
+            zipf.writestr(folder + filename, data)
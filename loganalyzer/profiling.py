@@ -0,0 +1,196 @@
+"""Stage timing for the pipeline: wall time, rows in and out, rows/s and peak memory.
+
+    profiler = Profiler()
+    with profiler.stage("detect", rows_in=len(df)) as stage:
+        anomalies = detect_anomalies(df)
+        stage.rows_out = len(anomalies)
+
+Every finished stage is kept in `profiler.records` and logged as one JSON
+object on the "loganalyzer.profiling" logger. Functions that take a
+`profiler` argument fall back to `NULL_PROFILER`, which records nothing and
+costs one no-op context per stage. A cProfile (or pyinstrument, if
+installed) capture of a whole run is opt-in through `start_capture`.
+"""
+
+import contextlib
+import io
+import json
+import logging
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:  # stages are timed without memory figures
+    psutil = None
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+logger = logging.getLogger("loganalyzer.profiling")
+
+CAPTURE_KINDS = ["cprofile"] + (["pyinstrument"] if pyinstrument is not None else [])
+PROFILE_LINES = 40              # functions listed in a cProfile report
+
+
+def enable_logging(stream=None):
+    """Print the stage records (one JSON object per line) to `stream`, stderr by default."""
+    if any(getattr(handler, "_stage_log", False) for handler in logger.handlers):
+        return
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler._stage_log = True
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+
+# ----- Memory -----
+class PeakRSS:
+    """Highest resident set size of this process while the block runs, sampled every few ms.
+
+    `start` and `peak` stay None when psutil is not installed.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.process = psutil.Process() if psutil is not None else None
+        self.start = self.peak = self.end = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _rss(self):
+        return self.process.memory_info().rss
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self._rss())
+
+    def __enter__(self):
+        if self.process is not None:
+            self.start = self.peak = self._rss()
+            self._thread = threading.Thread(target=self._sample, name="peak-rss", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self.end = self._rss()
+            self.peak = max(self.peak, self.end)
+
+    @property
+    def peak_delta(self):
+        """Peak RSS above the level at the start, in bytes (None without psutil)."""
+        return None if self.start is None else self.peak - self.start
+
+
+# ----- Stages -----
+class StageRecord:
+    """Measurements of one stage; `rows_in`/`rows_out` may be set inside the `with` block."""
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.seconds = None
+        self.peak_rss_delta = None
+        self.rss_delta = None
+
+    @property
+    def rows_per_s(self):
+        rows = self.rows_in if self.rows_in is not None else self.rows_out
+        if rows is None or not self.seconds:
+            return None
+        return round(rows / self.seconds)
+
+    def to_dict(self):
+        return {
+            "stage": self.name, "seconds": self.seconds, "rows_in": self.rows_in, "rows_out": self.rows_out,
+            "rows_per_s": self.rows_per_s, "peak_rss_delta": self.peak_rss_delta, "rss_delta": self.rss_delta,
+        }
+
+
+class Profiler:
+    """Collects a `StageRecord` per `stage()` block.
+
+    With `memory=True` (and psutil installed) a sampling thread follows the
+    RSS while a stage runs. A disabled profiler hands out throw-away records.
+    """
+
+    def __init__(self, enabled=True, memory=True):
+        self.enabled = enabled
+        self.memory = memory and psutil is not None
+        self.records = []
+        self.profile_text = None
+        self._capture = None
+
+    @contextlib.contextmanager
+    def stage(self, name, rows_in=None):
+        record = StageRecord(name, rows_in)
+        if not self.enabled:
+            yield record
+            return
+        rss = PeakRSS() if self.memory else contextlib.nullcontext()
+        with rss:
+            started = time.perf_counter()
+            try:
+                yield record
+            finally:
+                record.seconds = time.perf_counter() - started
+        if self.memory:
+            record.peak_rss_delta = rss.peak_delta
+            record.rss_delta = rss.end - rss.start
+        self.records.append(record)
+        logger.info(json.dumps(record.to_dict()))
+
+    def table(self):
+        """The records as a list of dicts, in the order the stages finished."""
+        return [record.to_dict() for record in self.records]
+
+    @property
+    def total_seconds(self):
+        return sum(record.seconds for record in self.records)
+
+    # ----- Whole-run capture -----
+    def start_capture(self, kind="cprofile"):
+        """Start a cProfile or pyinstrument capture; `stop_capture` stores its report in `profile_text`."""
+        if kind not in CAPTURE_KINDS:
+            raise ValueError(f"unknown profiler {kind!r}; available: {', '.join(CAPTURE_KINDS)}")
+        if kind == "pyinstrument":
+            capture = pyinstrument.Profiler()
+            capture.start()
+        else:
+            import cProfile
+            capture = cProfile.Profile()
+            capture.enable()
+        self._capture = (kind, capture)
+
+    def stop_capture(self):
+        if self._capture is None:
+            return None
+        kind, capture = self._capture
+        self._capture = None
+        if kind == "pyinstrument":
+            capture.stop()
+            self.profile_text = capture.output_text(unicode=True)
+        else:
+            import pstats
+            capture.disable()
+            out = io.StringIO()
+            pstats.Stats(capture, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+            self.profile_text = out.getvalue()
+        return self.profile_text
+
+    @contextlib.contextmanager
+    def capture(self, kind="cprofile"):
+        self.start_capture(kind)
+        try:
+            yield self
+        finally:
+            self.stop_capture()
+
+
+NULL_PROFILER = Profiler(enabled=False)
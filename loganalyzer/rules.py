@@ -0,0 +1,388 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from loganalyzer.windows import WindowDetector, WindowDistinctRule, WindowSequenceRule
+
+ANOMALY_COLUMNS = ["Rule", "User", "Description", "File", "Time"]
+RULES_VERSION = "2"   # bump when rule output changes (invalidates cached results)
+
+
+# ----- Rule definitions -----
+class SequenceRule:
+    """An event of type `first` directly followed by the same user's `then` event.
+
+    `first_path` / `then_path` are substrings one of which the event's path
+    must contain, `same_path` requires both events to touch the same path,
+    and `within` limits the gap between them in seconds.
+    Description fields: {user}, {path}, {next_path}, {file}, {time}.
+    """
+    kind = "sequence"
+
+    def __init__(self, rule_id, first, then, description, first_path=(), then_path=(),
+                 same_path=False, within=None):
+        self.rule_id = rule_id
+        self.first = first
+        self.then = then
+        self.description = description
+        self.first_path = tuple(first_path)
+        self.then_path = tuple(then_path)
+        self.same_path = same_path
+        self.within = within
+
+
+class EventRule:
+    """A single event of type `event` whose path contains one of `path`.
+
+    Description fields: {user}, {path}, {file}, {time}.
+    """
+    kind = "event"
+
+    def __init__(self, rule_id, event, description, path=()):
+        self.rule_id = rule_id
+        self.event = event
+        self.description = description
+        self.path = tuple(path)
+
+
+class DistinctRule:
+    """At least `threshold` distinct `field` values over `event` events per `by` group.
+
+    Description fields: {count}, {file} (the group value).
+    """
+    kind = "distinct"
+
+    def __init__(self, rule_id, event, field, by, threshold, description):
+        self.rule_id = rule_id
+        self.event = event
+        self.field = field
+        self.by = by
+        self.threshold = threshold
+        self.description = description
+
+
+_RULE_TYPES = {
+    "sequence": SequenceRule, "event": EventRule, "distinct": DistinctRule,
+    "window_sequence": WindowSequenceRule, "window_distinct": WindowDistinctRule,
+}
+
+
+def rules_from_spec(spec):
+    """Build rules from plain dicts, e.g. loaded from a JSON or YAML file.
+
+    Each dict has a "type" ("sequence", "event", "distinct", "window_sequence"
+    or "window_distinct"), an "id", and the keyword arguments of the matching
+    rule class.
+    """
+    rules = []
+    for entry in spec:
+        entry = dict(entry)
+        rule_type = entry.pop("type", None)
+        if rule_type not in _RULE_TYPES:
+            raise ValueError(f"rule {entry.get('id')!r}: unknown type {rule_type!r}; known: {', '.join(_RULE_TYPES)}")
+        rules.append(_RULE_TYPES[rule_type](entry.pop("id"), **entry))
+    return rules
+
+
+def load_rules(path):
+    """Load a rule spec file (`.json`, or `.yaml`/`.yml` when PyYAML is installed)."""
+    with open(path, encoding="utf-8") as f:
+        if str(path).endswith((".yaml", ".yml")):
+            import yaml
+            return rules_from_spec(yaml.safe_load(f))
+        return rules_from_spec(json.load(f))
+
+
+SENSITIVE_PATHS = ["/etc/passwd", "/opt/secure.shd"]
+
+DEFAULT_RULES = [
+    SequenceRule("R1", "EXEC", "FILE", "{user} executed then modified passwd.", then_path=["passwd"]),
+    SequenceRule("R2", "EXEC", "SHDW", "{user} executed then killed a process."),
+    DistinctRule("R3", "CONN", "ip", "File", 5, "{count} distinct IPs contacted in file {file}"),
+    EventRule("R4", "DEL", "Deleted sensitive file: {path}", path=SENSITIVE_PATHS),
+    SequenceRule("R5", "FILE", "DEL", "{user} modified then deleted `{path}`", same_path=True),
+    WindowDistinctRule("W1", "CONN", "ip", 5, 60, "{count} distinct IPs contacted within {within}s in file {file}"),
+    WindowSequenceRule("W2", "EXEC", "FILE", "{user} executed then modified {next_path} within {within}s.",
+                       within=10, then_path=["/etc/passwd"]),
+]
+ALL_RULES = tuple(rule.rule_id for rule in DEFAULT_RULES)
+
+# Wording used by the Day 4 detection page
+DESCRIPTIONS = {rule.rule_id: rule.description for rule in DEFAULT_RULES}
+
+# Shorter wording used by the combined dashboard
+SHORT_DESCRIPTIONS = {
+    "R1": "Exec then passwd mod",
+    "R2": "Exec then kill",
+    "R3": "{count} distinct IPs in {file}",
+    "R4": "Deleted sensitive file: {path}",
+    "R5": "Mod then del same file",
+    "W1": "{count} IPs within {within}s in {file}",
+    "W2": "Exec then passwd mod within {within}s",
+}
+
+
+# ----- Compiled rule set -----
+class CompiledRules:
+    """A rule set prepared for a single grouped pass over a sorted timeline.
+
+    All path substrings of all rules are tested once per distinct path value,
+    events are bucketed once by type (and once by type of the user's next
+    event), and each rule then only looks at the rows of its own bucket. A
+    new rule adds work proportional to its candidate rows, not another scan
+    of the timeline.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.needles = sorted({
+            needle
+            for rule in self.rules
+            for needle in getattr(rule, "path", ()) + getattr(rule, "first_path", ()) + getattr(rule, "then_path", ())
+        })
+        self.sequence = [rule for rule in self.rules if rule.kind == "sequence"]
+        self.events = [rule for rule in self.rules if rule.kind == "event"]
+        self.distinct = [rule for rule in self.rules if rule.kind == "distinct"]
+        self.windows = [rule for rule in self.rules if rule.kind.startswith("window_")]
+
+    def _path_hits(self, paths):
+        """Path codes plus, for every needle, a lookup of which codes contain it.
+
+        Code -1 (a missing path) is the last lookup slot and never matches.
+        """
+        codes, uniques = pd.factorize(paths)
+        uniques = [str(value) for value in uniques]
+        hits = {}
+        for needle in self.needles:
+            hits[needle] = np.array([needle in value for value in uniques] + [False], dtype=bool)
+        return codes, hits
+
+    @staticmethod
+    def _any_hit(hits, needles, codes):
+        if not needles:
+            return np.ones(len(codes), dtype=bool)
+        matched = np.zeros(len(codes), dtype=bool)
+        for needle in needles:
+            matched |= hits[needle][codes]
+        return matched
+
+    @staticmethod
+    def prepare(df):
+        """Copy of `df` with the columns the rules read, sorted by Timestamp."""
+        df = df.copy()
+        for column in ("File", "user", "path", "ip"):
+            if column not in df:
+                df[column] = np.nan
+        df["Timestamp"] = df["Timestamp"].astype(int)
+        return df.sort_values("Timestamp", kind="stable").reset_index(drop=True)
+
+    def run(self, df, descriptions=None):
+        descriptions = descriptions or {}
+        df = self.prepare(df)
+        path_codes, hits = self._path_hits(df["path"])
+        by_type = df.groupby("ShortType", sort=False).indices
+
+        pieces = []
+        for rank, rule in enumerate(self.distinct):
+            rows = df.iloc[by_type.get(rule.event, [])]
+            counts = rows.groupby(rule.by)[rule.field].nunique()
+            pieces.append(self._distinct_rows(rule, rank, counts, descriptions))
+        pieces.extend(self._run_sequence(df, path_codes, hits, descriptions))
+        pieces.extend(self._run_events(df, by_type, path_codes, hits, descriptions))
+        if self.windows:
+            pieces.extend(WindowDetector(self.windows).run(df, descriptions))
+        return self.finish(pieces)
+
+    @staticmethod
+    def finish(pieces):
+        """Concatenate anomaly pieces and put them in rule order."""
+        pieces = [piece for piece in pieces if not piece.empty]
+        if not pieces:
+            return pd.DataFrame(columns=ANOMALY_COLUMNS)
+        anomalies = pd.concat(pieces, ignore_index=True)
+        anomalies = anomalies.sort_values(["_stage", "_user", "_pos", "_rule"], kind="stable")
+        return anomalies[ANOMALY_COLUMNS].reset_index(drop=True)
+
+    @staticmethod
+    def _distinct_rows(rule, rank, counts, descriptions):
+        """Rows for one distinct-count rule from its per-group counts."""
+        counts = counts[counts >= rule.threshold]
+        template = descriptions.get(rule.rule_id, rule.description)
+        return pd.DataFrame({
+            "Rule": rule.rule_id,
+            "User": "-",
+            "Description": [template.format(count=count, file=group) for group, count in counts.items()],
+            "File": counts.index.tolist(),
+            "Time": "-",
+            "_stage": 0, "_user": rank, "_pos": np.arange(len(counts)), "_rule": 0,
+        })
+
+    def _run_events(self, df, by_type, path_codes, hits, descriptions, new=None):
+        """Rows for all single-event rules; only rows flagged in `new` when given."""
+        pieces = []
+        for rank, rule in enumerate(self.events):
+            candidates = by_type.get(rule.event, np.array([], dtype=int))
+            keep = self._any_hit(hits, rule.path, path_codes[candidates])
+            if new is not None:
+                keep &= new[candidates]
+            candidates = candidates[keep]
+            rows = df.iloc[candidates]
+            pieces.append(self._rows(rule, descriptions, rows["user"], rows["path"], rows["path"], rows["File"],
+                                     rows["Timestamp"], stage=2, user=np.full(len(rows), rank),
+                                     pos=candidates, rank=0))
+        return pieces
+
+    def _run_sequence(self, df, path_codes, hits, descriptions, new=None):
+        """Rows for all sequence rules from one pairing of each event with the user's next.
+
+        When `new` is given, only pairs whose second event is flagged in it count.
+        """
+        if not self.sequence:
+            return []
+        seq = np.flatnonzero(df["user"].notna().to_numpy())
+        users = df["user"].to_numpy()[seq]
+        user_code = pd.factorize(users)[0]
+        by_user = pd.Series(seq).groupby(user_code, sort=False)
+        position = by_user.cumcount().to_numpy()
+        nxt = by_user.shift(-1).to_numpy()      # row of the same user's next event, NaN if none
+
+        has_next = ~np.isnan(nxt)
+        first, second = seq[has_next], nxt[has_next].astype(int)
+        type_codes, type_names = pd.factorize(df["ShortType"])
+        pair_code = type_codes[first] * len(type_names) + type_codes[second]
+        pairs = pd.Series(np.arange(len(first))).groupby(pair_code).indices
+
+        timestamps = df["Timestamp"].to_numpy()
+        type_index = {name: code for code, name in enumerate(type_names)}
+        pieces = []
+        for rank, rule in enumerate(self.sequence):
+            if rule.first not in type_index or rule.then not in type_index:
+                continue
+            candidates = pairs.get(type_index[rule.first] * len(type_names) + type_index[rule.then])
+            if candidates is None:
+                continue
+            a, b = first[candidates], second[candidates]
+            keep = self._any_hit(hits, rule.first_path, path_codes[a]) & self._any_hit(hits, rule.then_path, path_codes[b])
+            if rule.same_path:
+                keep &= (path_codes[a] == path_codes[b]) & (path_codes[a] >= 0)
+            if rule.within is not None:
+                keep &= timestamps[b] - timestamps[a] <= rule.within
+            if new is not None:
+                keep &= new[b]
+            a, b, where = a[keep], b[keep], has_next.nonzero()[0][candidates[keep]]
+            rows, next_rows = df.iloc[a], df.iloc[b]
+            pieces.append(self._rows(rule, descriptions, rows["user"], rows["path"], next_rows["path"], rows["File"],
+                                     next_rows["Timestamp"], stage=1, user=user_code[where],
+                                     pos=position[where], rank=rank))
+        return pieces
+
+    @staticmethod
+    def _rows(rule, descriptions, users, paths, next_paths, files, times, stage, user, pos, rank):
+        """Anomaly records for the matched rows of one rule, plus their sort keys."""
+        template = descriptions.get(rule.rule_id, rule.description)
+        users, paths, next_paths, files, times = (
+            column.tolist() for column in (users, paths, next_paths, files, times)
+        )
+        return pd.DataFrame({
+            "Rule": rule.rule_id,
+            "User": users,
+            "Description": [
+                template.format(user=u, path=p, next_path=n, file=f, time=t)
+                for u, p, n, f, t in zip(users, paths, next_paths, files, times)
+            ],
+            "File": files,
+            "Time": times,
+            "_stage": stage, "_user": user, "_pos": pos, "_rule": rank,
+        })
+
+
+def compile_rules(rules=DEFAULT_RULES):
+    """Prepare a list of rules for `CompiledRules.run`."""
+    return CompiledRules(rules)
+
+
+def select_rules(ruleset, rules=None):
+    """The rules of `ruleset` whose ids are in `rules`, or all of them when `rules` is None."""
+    if rules is None:
+        return list(ruleset)
+    return [rule for rule in ruleset if rule.rule_id in rules]
+
+
+def detect_anomalies(df, rules=None, descriptions=DESCRIPTIONS, ruleset=DEFAULT_RULES):
+    """Run a rule set over a parsed timeline and return one row per hit.
+
+    `ruleset` holds the rule definitions (R1-R5 by default), `rules` picks
+    which of their ids to run (every rule of `ruleset` when None) and
+    `descriptions` overrides their wording.
+    Rows come out in the order the old per-user loop produced them:
+    distinct-count rules, then per user and event pair the sequence rules,
+    then single-event rules; time-window rules follow in time order.
+    """
+    compiled = compile_rules(select_rules(ruleset, rules))
+    return compiled.run(df, descriptions)
+
+
+# ----- Incremental detection -----
+class IncrementalDetector:
+    """Run a rule set over a timeline that arrives in batches (e.g. a followed log).
+
+    Only the newest event of every user is kept between batches, so a
+    sequence whose first event came in an earlier batch is still found when
+    its second event arrives. Distinct-count rules keep their value sets per
+    group, and time-window rules their (bounded) window state. Events of a
+    batch are assumed not to be older than the events seen before it.
+    """
+
+    def __init__(self, rules=None, descriptions=DESCRIPTIONS, ruleset=DEFAULT_RULES):
+        self.compiled = compile_rules(select_rules(ruleset, rules))
+        self.descriptions = descriptions
+        self.pending = None
+        self.distinct_values = [{} for _ in self.compiled.distinct]
+        self.windows = WindowDetector(self.compiled.windows)
+        self.found = []
+
+    def update(self, batch):
+        """Feed one batch of new events and return the sequence/event hits it completes."""
+        if batch.empty:
+            return pd.DataFrame(columns=ANOMALY_COLUMNS)
+        compiled = self.compiled
+        batch = compiled.prepare(batch)
+        for rule, values in zip(compiled.distinct, self.distinct_values):
+            rows = batch[batch["ShortType"] == rule.event].dropna(subset=[rule.field])
+            for group, field in zip(rows[rule.by].tolist(), rows[rule.field].tolist()):
+                values.setdefault(group, set()).add(field)
+
+        if self.pending is not None:
+            df = pd.concat([self.pending.assign(_new=False), batch.assign(_new=True)], ignore_index=True)
+            df = df.sort_values("Timestamp", kind="stable").reset_index(drop=True)
+        else:
+            df = batch.assign(_new=True)
+        new = df.pop("_new").to_numpy(dtype=bool)
+
+        path_codes, hits = compiled._path_hits(df["path"])
+        by_type = df.groupby("ShortType", sort=False).indices
+        pieces = compiled._run_sequence(df, path_codes, hits, self.descriptions, new=new)
+        pieces.extend(compiled._run_events(df, by_type, path_codes, hits, self.descriptions, new=new))
+        pieces.extend(self.windows.run(batch, self.descriptions))
+        found = compiled.finish(pieces)
+
+        users = df[df["user"].notna()]
+        self.pending = users.groupby("user", sort=False).tail(1).reset_index(drop=True)
+        if not found.empty:
+            self.found.append(found)
+        return found
+
+    @property
+    def anomalies(self):
+        """All hits so far: distinct-count rules first, then the others in arrival order."""
+        pieces = [
+            CompiledRules._distinct_rows(rule, rank, pd.Series({group: len(seen) for group, seen in values.items()},
+                                                                dtype=int).sort_index(), self.descriptions)
+            for rank, (rule, values) in enumerate(zip(self.compiled.distinct, self.distinct_values))
+        ]
+        pieces = [piece[ANOMALY_COLUMNS] for piece in pieces if not piece.empty]
+        pieces += self.found
+        if not pieces:
+            return pd.DataFrame(columns=ANOMALY_COLUMNS)
+        return pd.concat(pieces, ignore_index=True)
@@ -0,0 +1,268 @@
+"""Statistical anomaly scoring on fixed time windows per user and per source file.
+
+`window_features` bins the timeline into `width`-second windows and counts,
+per window, the events of every ShortType, distinct IPs, distinct paths
+and process kills (SHDW). `AnomalyScorer` flags windows whose rolling
+z-score or Isolation Forest score stands out and returns them as rows of
+the anomaly table ("ZSCORE" and "IFOREST"). Isolation Forest needs
+scikit-learn; without it only z-scores are computed.
+"""
+
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from loganalyzer.rules import ANOMALY_COLUMNS
+
+try:
+    from sklearn.ensemble import IsolationForest
+except ImportError:  # z-scores only
+    IsolationForest = None
+
+SHORT_TYPES = ["EXEC", "FILE", "DEL", "LOG", "CONN"]
+FEATURE_COLUMNS = SHORT_TYPES + ["other", "kills", "distinct_ips", "distinct_paths", "events"]
+ENTITY_COLUMNS = ("user", "File")
+DEFAULT_WINDOW_SECONDS = 10
+DEFAULT_Z_WINDOW = 30           # earlier windows of the same entity the z-score compares with
+DEFAULT_Z_MIN_HISTORY = 5       # windows needed before a z-score is computed
+DEFAULT_Z_THRESHOLD = 4.0
+MIN_STD = 1.0                   # a flat history still needs a jump of z_threshold events
+DEFAULT_CONTAMINATION = 0.01
+DEFAULT_BATCH_ROWS = 50_000     # feature rows scored per Isolation Forest call
+DEFAULT_FIT_ROWS = 100_000      # windows sampled to fit a forest (and place its threshold)
+
+SCORE_DESCRIPTIONS = {
+    "ZSCORE": "{feature} = {value:g} in a {width}s window (z = {score:.1f} against the last {history} windows)",
+    "IFOREST": "Unusual {width}s window: {events:g} events (isolation score {score:.3f})",
+}
+
+
+# ----- Features -----
+def _distinct_per_group(group, values, n_groups):
+    """Distinct non-missing `values` per group id."""
+    codes = pd.factorize(values)[0]
+    present = codes >= 0
+    if not present.any():
+        return np.zeros(n_groups, dtype=np.int64)
+    pairs = pd.unique(group[present] * (codes.max() + 1) + codes[present])
+    return np.bincount(pairs // (codes.max() + 1), minlength=n_groups)
+
+
+def window_features(df, width=DEFAULT_WINDOW_SECONDS, by=ENTITY_COLUMNS):
+    """Feature matrix with one row per (entity column, entity, window) that has events.
+
+    Columns: "Kind" (the entity column), "Entity", "Window" (start of the
+    window) and `FEATURE_COLUMNS`. Rows are sorted by Kind, Entity and Window.
+    Every (entity, window) pair becomes one integer group id, and the
+    features are bincounts over those ids.
+    """
+    timestamps = df["Timestamp"].to_numpy(dtype=np.int64)
+    window = timestamps // width
+    window -= window.min() if len(window) else 0
+    type_names = SHORT_TYPES + ["other", "kills"]
+    short = df["ShortType"].astype(object).replace("SHDW", "kills")
+    type_codes = pd.Categorical(short, categories=type_names).codes.astype(np.int64)
+    type_codes[type_codes < 0] = type_names.index("other")
+    ips = df["ip"].to_numpy() if "ip" in df else np.full(len(df), np.nan)
+    paths = df["path"].to_numpy() if "path" in df else np.full(len(df), np.nan)
+
+    frames = []
+    for column in by:
+        if column not in df:
+            continue
+        entity_codes, entities = pd.factorize(df[column])
+        valid = np.flatnonzero(entity_codes >= 0)
+        if not len(valid):
+            continue
+        group, keys = pd.factorize(entity_codes[valid] * (int(window.max()) + 1) + window[valid], sort=True)
+        counts = np.bincount(group * len(type_names) + type_codes[valid], minlength=len(keys) * len(type_names))
+        features = pd.DataFrame(counts.reshape(len(keys), len(type_names)), columns=type_names)
+        features["distinct_ips"] = _distinct_per_group(group, ips[valid], len(keys))
+        features["distinct_paths"] = _distinct_per_group(group, paths[valid], len(keys))
+        features["events"] = np.bincount(group, minlength=len(keys))
+        features.insert(0, "Kind", column)
+        features.insert(1, "Entity", np.asarray(entities, dtype=object)[keys // (int(window.max()) + 1)])
+        features.insert(2, "Window", (keys % (int(window.max()) + 1) + timestamps.min() // width) * width)
+        frames.append(features)
+    if not frames:
+        return pd.DataFrame(columns=["Kind", "Entity", "Window"] + FEATURE_COLUMNS)
+    features = pd.concat(frames, ignore_index=True)
+    features[FEATURE_COLUMNS] = features[FEATURE_COLUMNS].astype(np.float64)
+    features["Entity"] = features["Entity"].astype(str)
+    return features.sort_values(["Kind", "Entity", "Window"], kind="stable").reset_index(drop=True)
+
+
+def rolling_zscores(features, history=DEFAULT_Z_WINDOW, min_history=DEFAULT_Z_MIN_HISTORY,
+                    width=DEFAULT_WINDOW_SECONDS):
+    """z-score of every feature of every window against the entity's `history` previous windows.
+
+    The history is the `history` windows of `width` seconds just before the
+    window, empty ones included (as all-zero features), so a burst after an
+    idle spell is compared with the quiet spell. It never reaches back
+    before the entity's first window. Computed with prefix sums over the
+    sorted feature matrix, so the cost is a few array passes whatever the
+    number of entities. NaN where the entity has fewer than `min_history`
+    earlier windows.
+    """
+    values = features[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    n = len(values)
+    group = features.groupby(["Kind", "Entity"], sort=False).ngroup().to_numpy()
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]]) if n else np.array([], dtype=np.int64)
+    group_start = np.repeat(starts, np.diff(np.r_[starts, n]))
+
+    rows = np.arange(n)
+    slot = features["Window"].to_numpy(dtype=np.int64) // width
+    if n:
+        slot -= slot.min()
+    # one increasing key per (entity, window); the rows with events among the
+    # `history` windows before each row start at the first key >= key - history
+    keys = group.astype(np.int64) * (int(slot.max(initial=0)) + history + 1) + slot
+    lo = np.maximum(np.searchsorted(keys, keys - history), group_start)
+    count = np.minimum(slot - slot[group_start], history)[:, None]
+    sums = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+    squares = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values ** 2, axis=0)])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (sums[rows] - sums[lo]) / count
+        var = (squares[rows] - squares[lo]) / count - mean ** 2
+        z = (values - mean) / np.maximum(np.sqrt(np.maximum(var, 0)), MIN_STD)
+    z[(count < min_history).ravel()] = np.nan
+    return pd.DataFrame(z, columns=FEATURE_COLUMNS, index=features.index), count.ravel()
+
+
+# ----- Scorer -----
+class AnomalyScorer:
+    """Scores window features with rolling z-scores and Isolation Forest models.
+
+    One forest is fitted per entity kind (users and files behave
+    differently) the first time `score` runs, and reused for every later
+    timeline until `reset`, so uploads are judged against the same
+    baseline. `save`/`load` keep the fitted scorer on disk. Forest scoring
+    runs in batches of `batch_rows` on `n_jobs` threads (all cores by default).
+    """
+
+    def __init__(self, width=DEFAULT_WINDOW_SECONDS, by=ENTITY_COLUMNS, z_history=DEFAULT_Z_WINDOW,
+                 z_threshold=DEFAULT_Z_THRESHOLD, contamination=DEFAULT_CONTAMINATION, n_estimators=100,
+                 batch_rows=DEFAULT_BATCH_ROWS, fit_rows=DEFAULT_FIT_ROWS, n_jobs=None, random_state=0):
+        self.width = width
+        self.by = tuple(by)
+        self.z_history = z_history
+        self.z_threshold = z_threshold
+        self.contamination = contamination
+        self.n_estimators = n_estimators
+        self.batch_rows = batch_rows
+        self.fit_rows = fit_rows
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.random_state = random_state
+        self.models = {}
+
+    @property
+    def forest_available(self):
+        return IsolationForest is not None
+
+    @property
+    def fitted(self):
+        return bool(self.models)
+
+    def reset(self):
+        """Forget the fitted forests; the next `score` fits new ones."""
+        self.models = {}
+
+    def features(self, df):
+        return window_features(df, self.width, self.by)
+
+    def fit(self, features):
+        """Fit one forest per entity kind on (at most `fit_rows` windows of) a feature matrix."""
+        if not self.forest_available:
+            raise ImportError("scikit-learn is needed for Isolation Forest scoring")
+        rng = np.random.default_rng(self.random_state)
+        for kind, rows in features.groupby("Kind", sort=False).indices.items():
+            if len(rows) > self.fit_rows:
+                rows = np.sort(rng.choice(rows, self.fit_rows, replace=False))
+            model = IsolationForest(n_estimators=self.n_estimators, contamination=self.contamination,
+                                    n_jobs=self.n_jobs, random_state=self.random_state)
+            self.models[kind] = model.fit(features[FEATURE_COLUMNS].to_numpy()[rows])
+        return self
+
+    def forest_scores(self, features):
+        """Isolation Forest decision values (below 0 = anomalous), NaN for kinds without a model."""
+        values = features[FEATURE_COLUMNS].to_numpy()
+        # quiet windows repeat the same few feature vectors: score each vector once
+        vector = features.groupby(["Kind"] + FEATURE_COLUMNS, sort=False).ngroup().to_numpy()
+        first = pd.Series(np.arange(len(vector))).groupby(vector, sort=True).first().to_numpy()
+        kinds = features["Kind"].to_numpy()[first]
+        scored = np.full(len(first), np.nan)
+        with ThreadPoolExecutor(max_workers=self.n_jobs) as pool:
+            for kind, model in self.models.items():
+                unique = np.flatnonzero(kinds == kind)
+                batches = [unique[start:start + self.batch_rows] for start in range(0, len(unique), self.batch_rows)]
+                for batch, result in zip(batches, pool.map(lambda b: model.decision_function(values[first[b]]), batches)):
+                    scored[batch] = result
+        return scored[vector]
+
+    def score(self, df, descriptions=None):
+        """Anomaly rows ("ZSCORE", "IFOREST") for the windows of `df` that stand out."""
+        descriptions = {**SCORE_DESCRIPTIONS, **(descriptions or {})}
+        features = self.features(df)
+        if features.empty:
+            return pd.DataFrame(columns=ANOMALY_COLUMNS)
+        pieces = [self._zscore_rows(features, descriptions["ZSCORE"])]
+        if self.forest_available:
+            missing = set(features["Kind"]) - set(self.models)
+            if missing:
+                self.fit(features[features["Kind"].isin(missing)])
+            pieces.append(self._forest_rows(features, descriptions["IFOREST"]))
+        pieces = [piece for piece in pieces if not piece.empty]
+        if not pieces:
+            return pd.DataFrame(columns=ANOMALY_COLUMNS)
+        anomalies = pd.concat(pieces, ignore_index=True)
+        return anomalies.sort_values(["Time", "Rule"], kind="stable").reset_index(drop=True)
+
+    def _zscore_rows(self, features, template):
+        z, history = rolling_zscores(features, self.z_history, width=self.width)
+        filled = z.fillna(-np.inf).to_numpy()
+        best = filled.argmax(axis=1)
+        score = filled[np.arange(len(filled)), best]
+        hit = np.flatnonzero(score >= self.z_threshold)
+        values = features[FEATURE_COLUMNS].to_numpy()
+        return self._rows(features.iloc[hit], "ZSCORE", [
+            template.format(feature=FEATURE_COLUMNS[b], value=values[i, b], width=self.width, score=score[i],
+                            history=history[i])
+            for i, b in zip(hit.tolist(), best[hit].tolist())
+        ])
+
+    def _forest_rows(self, features, template):
+        scores = self.forest_scores(features)
+        hit = np.flatnonzero(scores < 0)
+        events = features["events"].to_numpy()
+        return self._rows(features.iloc[hit], "IFOREST", [
+            template.format(events=events[i], width=self.width, score=scores[i]) for i in hit.tolist()
+        ])
+
+    @staticmethod
+    def _rows(windows, rule, descriptions):
+        is_user = (windows["Kind"] == "user").to_numpy()
+        entity = windows["Entity"].to_numpy()
+        return pd.DataFrame({
+            "Rule": rule,
+            "User": np.where(is_user, entity, "-"),
+            "Description": descriptions,
+            "File": np.where(is_user, "-", entity),
+            "Time": windows["Window"].tolist(),
+        })
+
+    # ----- Persistence -----
+    def save(self, path):
+        with open(path, "wb") as f:
+            pickle.dump(self, f)
+
+    @classmethod
+    def load(cls, path):
+        """A scorer written by `save` (only load files you created: this unpickles)."""
+        with open(path, "rb") as f:
+            scorer = pickle.load(f)
+        if not isinstance(scorer, cls):
+            raise TypeError(f"{path} does not hold an {cls.__name__}")
+        return scorer
@@ -0,0 +1,132 @@
+import io
+import os
+
+import pandas as pd
+
+from loganalyzer.export import iter_csv, table_chunks, write_chunks
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:  # only CSV hand-offs without pyarrow
+    pa = None
+
+# Export formats: label -> (file extension, MIME type)
+FORMATS = {
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Feather": ("feather", "application/vnd.apache.arrow.file"),
+    "CSV": ("csv", "text/csv"),
+}
+UPLOAD_TYPES = ["parquet", "feather", "arrow", "csv"]
+
+_PARQUET_MAGIC = b"PAR1"
+_ARROW_MAGIC = b"ARROW1"
+
+
+def available_formats():
+    """Export format labels usable here, typed formats first."""
+    return list(FORMATS) if pa is not None else ["CSV"]
+
+
+# ----- Writing -----
+def _arrow_ready(df):
+    """`df` with object columns that mix value types (e.g. Time: "-" and numbers) as strings."""
+    df = df.copy()
+    for column in df.columns:
+        values = df[column]
+        if values.dtype == object and pd.api.types.infer_dtype(values, skipna=True).startswith("mixed"):
+            df[column] = values.where(values.isna(), values.astype(str))
+    return df
+
+
+def to_bytes(df, fmt="Parquet"):
+    """Serialize a stage's output as Parquet, Feather (Arrow IPC) or CSV.
+
+    Typed formats store the frame with its dtypes (a compact timeline stays
+    compact); CSV writes the textual form the pages have always exported,
+    encoded chunk by chunk.
+    """
+    buffer = io.BytesIO()
+    if fmt == "CSV":
+        write_chunks(buffer, iter_csv(df))
+        return buffer.getvalue()
+    df = _arrow_ready(df.reset_index(drop=True))
+    if fmt == "Parquet":
+        df.to_parquet(buffer, index=False)
+    elif fmt == "Feather":
+        # uncompressed, so reading it back can map the file instead of copying it
+        feather.write_feather(df, buffer, compression="uncompressed")
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+    return buffer.getvalue()
+
+
+def write_table(df, path):
+    """Write `df` to `path` in the format given by its extension.
+
+    `.parquet`, `.feather`/`.arrow`, `.json` and `.jsonl`; anything else is
+    written as CSV. Text formats are written chunk by chunk.
+    """
+    extension = os.path.splitext(os.fspath(path))[1].lstrip(".").lower()
+    fmt = {"parquet": "Parquet", "feather": "Feather", "arrow": "Feather"}.get(extension)
+    with open(path, "wb") as f:
+        if fmt is None:
+            write_chunks(f, table_chunks(df, extension if extension in ("json", "jsonl") else "csv"))
+        else:
+            f.write(to_bytes(df, fmt))
+
+
+# ----- Reading -----
+def _detect_format(head, name):
+    if head.startswith(_PARQUET_MAGIC):
+        return "Parquet"
+    if head.startswith(_ARROW_MAGIC):
+        return "Feather"
+    if name.lower().endswith((".parquet", ".feather", ".arrow")):
+        raise ValueError(f"{name} is not a valid Parquet/Feather file")
+    return "CSV"
+
+
+def read_table(source, columns=None):
+    """Load a stage's output from a path or an uploaded file.
+
+    Parquet and Feather are detected by their magic bytes and read through
+    Arrow: paths are memory-mapped and uploads are read from their buffer
+    without copying it, and only `columns` (those present) are decoded. Any
+    other input is read as CSV. Columns in `columns` that the file does not
+    have are simply left out.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        name = os.fspath(source)
+        with open(name, "rb") as f:
+            head = f.read(8)
+    else:
+        name = getattr(source, "name", "")
+        data = source.getvalue()
+        head = data[:8]
+    fmt = _detect_format(head, name)
+
+    if fmt == "CSV":
+        usecols = (lambda column: column in columns) if columns is not None else None
+        if isinstance(source, (str, os.PathLike)):
+            return pd.read_csv(name, usecols=usecols)
+        return pd.read_csv(io.BytesIO(data), usecols=usecols)
+    if pa is None:
+        raise ImportError(f"pyarrow is needed to read {fmt} files")
+
+    if isinstance(source, (str, os.PathLike)):
+        handle = pa.memory_map(name, "r")
+    else:
+        handle = pa.BufferReader(pa.py_buffer(data))
+    with handle:
+        if fmt == "Parquet":
+            parquet = pq.ParquetFile(handle)
+            if columns is not None:
+                columns = [column for column in columns if column in parquet.schema_arrow.names]
+            table = parquet.read(columns=columns)
+        else:
+            table = pa.ipc.open_file(handle).read_all()
+            if columns is not None:
+                table = table.select([column for column in columns if column in table.column_names])
+        return table.to_pandas()
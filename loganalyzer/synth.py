@@ -0,0 +1,146 @@
+"""Synthetic `.vlog` files in the real log grammar, for benchmarks and load tests.
+
+    python -m loganalyzer.synth <out dir> --lines 1000000 --files 4 [--users 50] [--ips 5000]
+                                [--corrupt-rate 0.001] [--mix EXEC=2,FILE=2,CONN=1] [--seed 0]
+
+Lines look like the sample logs (`0x1F[ts:7716950]|EVNT:XR-FILE!@MOD_usr:neo99=>/etc/passwd`).
+The output only depends on the arguments and the seed, so two runs of a
+benchmark read the same bytes.
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+# Share of every event type, as in the sample logs
+DEFAULT_EVENT_MIX = {"EXEC": 47, "FILE": 47, "DEL": 35, "LOG": 35, "SHDW": 32, "CONN": 54}
+SAMPLE_USERS = ["tara4", "odinX", "mira01", "neo99", "xav23"]
+SAMPLE_PATHS = ["/usr/lib/xrun.conf", "/opt/secure.shd", "/tmp/init.sock", "/bin/xz", "/etc/passwd"]
+DEFAULT_START_TS = 7716948
+BLOCK_LINES = 100_000           # lines generated (and written) at a time
+
+# Payload of every event type; {user}, {path}, {pid} and {ip} are filled in per line
+_PAYLOADS = {
+    "EXEC": "RUN_usr:{user}=>{path}",
+    "FILE": "MOD_usr:{user}=>{path}",
+    "DEL": "DEL_usr:{user}=>{path}",
+    "LOG": "OPN_usr:{user}=>{path}",
+    "SHDW": "KILL_proc:pid{pid}",
+    "CONN": "IP:{ip}",
+}
+_CORRUPT_LINES = ["!!MALFORMED!!DATA!!", "0xXYZ[ts:BADTIMESTAMP]|EVNT:???"]
+
+
+def _users(count):
+    return (SAMPLE_USERS + [f"user{i}" for i in range(len(SAMPLE_USERS), count)])[:count]
+
+
+def _ips(count, rng):
+    octets = rng.integers(1, 255, size=(count, 4))
+    return [".".join(map(str, row)) for row in octets]
+
+
+def parse_mix(text):
+    """`"EXEC=2,CONN=1"` -> `{"EXEC": 2.0, "CONN": 1.0}`."""
+    mix = {}
+    for item in text.split(","):
+        short, _, weight = item.partition("=")
+        if short.strip() not in _PAYLOADS:
+            raise ValueError(f"unknown event type {short.strip()!r}; expected one of {', '.join(_PAYLOADS)}")
+        mix[short.strip()] = float(weight or 1)
+    return mix
+
+
+class LogSynth:
+    """Draws synthetic log lines with a given event mix, cardinality and corruption rate.
+
+    `event_mix` maps ShortType to a relative weight. `users` and `ips` are
+    the numbers of distinct users and IPv4 addresses, `corrupt_rate` the
+    share of lines replaced by malformed ones. Timestamps grow by
+    `ts_step` seconds per line on average.
+    """
+
+    def __init__(self, event_mix=None, users=len(SAMPLE_USERS), ips=1000, paths=SAMPLE_PATHS,
+                 corrupt_rate=0.0, start_ts=DEFAULT_START_TS, ts_step=2, seed=0):
+        mix = event_mix or DEFAULT_EVENT_MIX
+        weights = np.array(list(mix.values()), dtype=float)
+        self.types = list(mix)
+        self.weights = weights / weights.sum()
+        self.rng = np.random.default_rng(seed)
+        self.users = _users(users)
+        self.ips = _ips(ips, self.rng)
+        self.paths = list(paths)
+        self.corrupt_rate = corrupt_rate
+        self.ts = start_ts
+        self.ts_step = ts_step
+
+    def lines(self, count, first_index=0):
+        """`count` lines as one string (newline-terminated), numbered from `first_index`."""
+        rng = self.rng
+        types = rng.choice(len(self.types), size=count, p=self.weights)
+        steps = rng.integers(0, 2 * self.ts_step + 1, size=count)
+        timestamps = self.ts + np.cumsum(steps)
+        self.ts = int(timestamps[-1]) if count else self.ts
+        users = rng.integers(0, len(self.users), size=count)
+        paths = rng.integers(0, len(self.paths), size=count)
+        ips = rng.integers(0, len(self.ips), size=count)
+        pids = rng.integers(1000, 10000, size=count)
+        corrupt = np.flatnonzero(rng.random(count) < self.corrupt_rate) if self.corrupt_rate else []
+
+        templates = [f"XR-{short}!@" + _PAYLOADS[short] for short in self.types]
+        lines = [
+            f"0x{first_index + i:X}[ts:{ts}]|EVNT:" + templates[t].format(
+                user=self.users[u], path=self.paths[p], pid=pid, ip=self.ips[ip]
+            )
+            for i, (t, ts, u, p, ip, pid) in enumerate(zip(
+                types.tolist(), timestamps.tolist(), users.tolist(), paths.tolist(), ips.tolist(), pids.tolist()
+            ))
+        ]
+        for i in corrupt:
+            kind = rng.integers(0, len(_CORRUPT_LINES) + 1)
+            # a valid line cut short before its "!@" separator, or a line of pure garbage
+            lines[i] = lines[i][:lines[i].index("!@")] if kind == len(_CORRUPT_LINES) else _CORRUPT_LINES[kind]
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def write_logs(out_dir, lines, files=1, prefix="synth", **options):
+    """Write `lines` synthetic lines into `files` files of `out_dir` and return their paths.
+
+    The lines are split evenly in time order: every file is one stretch of
+    the same timeline, numbered from 0x0 like a real session. `options` go to
+    `LogSynth`.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    synth = LogSynth(**options)
+    bounds = np.linspace(0, lines, files + 1).astype(int)
+    paths = []
+    for number, (start, end) in enumerate(zip(bounds, bounds[1:]), start=1):
+        path = os.path.join(out_dir, f"{prefix}_{number}.vlog")
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            for offset in range(0, end - start, BLOCK_LINES):
+                f.write(synth.lines(min(BLOCK_LINES, end - start - offset), first_index=offset))
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m loganalyzer.synth", description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--files", type=int, default=1)
+    parser.add_argument("--prefix", default="synth")
+    parser.add_argument("--users", type=int, default=len(SAMPLE_USERS), help="distinct users")
+    parser.add_argument("--ips", type=int, default=1000, help="distinct IPv4 addresses")
+    parser.add_argument("--corrupt-rate", type=float, default=0.0, help="share of malformed lines")
+    parser.add_argument("--mix", type=parse_mix, help="event weights, e.g. EXEC=2,FILE=2,CONN=1")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    paths = write_logs(args.out_dir, args.lines, args.files, args.prefix, event_mix=args.mix, users=args.users,
+                       ips=args.ips, corrupt_rate=args.corrupt_rate, seed=args.seed)
+    print(f"Wrote {args.lines} lines into {len(paths)} file(s) under {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Compact, typed representation of a parsed timeline.
+
+Schema of a compact timeline (one row per event):
+
+    File        category   source file name
+    Index       int64      the line's 0x index, parsed from hex
+    Timestamp   int64      [ts:...] value
+    EventType   category   e.g. "XR-EXEC"
+    ShortType   category   e.g. "EXEC"
+    PayloadRaw  str        payload as written in the log
+    user        category   usr: value (FILE/EXEC/DEL/LOG events)
+    path        category   =>... value (FILE/EXEC/DEL/LOG events)
+    ip          UInt32     IPv4 address packed big-endian (CONN events)
+    pid         Int32      process id (SHDW events)
+    error       category   "Malformed payload" when the payload did not parse
+
+Missing payload fields are NA. A column whose values cannot be converted
+without losing information (a hex index beyond int64, an address that is
+not a plain dotted IPv4, a pid beyond int32) keeps its parsed type, so
+`expand` can always give back the textual frame the parser produced.
+"""
+
+import numpy as np
+import pandas as pd
+
+CATEGORY_COLUMNS = ["File", "EventType", "ShortType", "user", "path", "error"]
+
+
+# ----- Packing helpers -----
+def _hex_index(value):
+    """Integer for an index like "0x1F", or None when it would not round-trip."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if not isinstance(value, str) or not value.startswith("0x"):
+        return None
+    try:
+        number = int(value, 16)
+    except ValueError:
+        return None
+    return number if "0x%X" % number == value and number < 1 << 63 else None
+
+
+def _ipv4(value):
+    """Packed integer for a dotted IPv4 address, or None when it would not round-trip."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    parts = value.split(".") if isinstance(value, str) else ()
+    if len(parts) != 4 or not all(part.isdigit() and part.isascii() for part in parts):
+        return None
+    octets = [int(part) for part in parts]
+    if any(octet > 255 for octet in octets) or ".".join(map(str, octets)) != value:
+        return None
+    return (octets[0] << 24) | (octets[1] << 16) | (octets[2] << 8) | octets[3]
+
+
+def _convert_uniques(series, convert, dtype):
+    """Apply `convert` once per distinct value; None if any value does not convert."""
+    codes, uniques = pd.factorize(series)
+    converted = [convert(value) for value in uniques]
+    if any(value is None for value in converted):
+        return None
+    values = np.array(converted + [0], dtype=np.int64)[codes]
+    result = pd.array(values, dtype=dtype)
+    result[codes < 0] = pd.NA
+    return pd.Series(result, index=series.index, name=series.name)
+
+
+def pack_ipv4(series):
+    """UInt32 Series of packed addresses, or None if a value is not a plain IPv4."""
+    return _convert_uniques(series, _ipv4, "UInt32")
+
+
+def unpack_ipv4(series):
+    """Dotted-quad strings for a Series of packed addresses (NaN where missing)."""
+    codes, uniques = pd.factorize(series)
+    dotted = np.array([
+        f"{value >> 24}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}" for value in map(int, uniques)
+    ] + [np.nan], dtype=object)
+    return pd.Series(dotted[codes], index=series.index, name=series.name)
+
+
+# ----- Conversion -----
+def compact(df):
+    """Typed copy of a parsed timeline, following the schema above.
+
+    Works on any subset of the columns and on frames that are already
+    (partly) compact, e.g. the concatenation of compact frames.
+    """
+    df = df.copy()
+    for column in CATEGORY_COLUMNS:
+        if column in df and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("category")
+    if "Timestamp" in df and df["Timestamp"].dtype != np.int64:
+        try:
+            df["Timestamp"] = df["Timestamp"].astype(np.int64)
+        except OverflowError:
+            pass    # a timestamp beyond int64: keep the parsed values
+    if "Index" in df and not pd.api.types.is_integer_dtype(df["Index"]):
+        index = _convert_uniques(df["Index"], _hex_index, "Int64")
+        if index is not None and not index.hasnans:
+            df["Index"] = index.astype(np.int64)
+    if "ip" in df and df["ip"].dtype != "UInt32":
+        ip = pack_ipv4(df["ip"])
+        if ip is not None:
+            df["ip"] = ip
+    if "pid" in df and df["pid"].dtype != "Int32":
+        pid = pd.to_numeric(df["pid"], errors="coerce")
+        whole = pid.dropna()
+        if (pid.isna() == df["pid"].isna()).all() and (whole == whole.round()).all() \
+                and whole.between(-(1 << 31), (1 << 31) - 1).all():
+            df["pid"] = pid.astype("Int32")
+    return df
+
+
+def append(timeline, df):
+    """Compact timeline of the rows of `timeline` followed by those of `df`.
+
+    Only `df` (parsed or compact) is converted. The category columns of
+    `timeline` get the new values added as categories, which leaves their
+    codes untouched, and a column only one side has is filled with NA of the
+    other side's type, so the rows already in `timeline` are copied but not
+    encoded again. `timeline` itself is not changed.
+    """
+    df = compact(df)
+    if timeline.empty:
+        return df
+    if df.empty:
+        return timeline
+    timeline = timeline.copy(deep=False)
+    for target, source in ((df, timeline), (timeline, df)):
+        for column in source.columns.difference(target.columns, sort=False):
+            target[column] = pd.Series(index=target.index, dtype=source[column].dtype)
+    for column in CATEGORY_COLUMNS:
+        if column in timeline and column in df and isinstance(timeline[column].dtype, pd.CategoricalDtype):
+            new = df[column].cat.categories.difference(timeline[column].cat.categories)
+            if len(new):
+                timeline[column] = timeline[column].cat.add_categories(new)
+            df[column] = df[column].cat.set_categories(timeline[column].cat.categories)
+    combined = pd.concat([timeline, df], ignore_index=True)
+    if any(combined[column].dtype != frame[column].dtype for column in combined for frame in (timeline, df)):
+        combined = compact(combined)   # a column kept in its parsed type on one side only
+    return combined
+
+
+def expand(df):
+    """The textual frame the parser produced, for display and CSV/JSON export."""
+    df = df.copy()
+    for column in CATEGORY_COLUMNS:
+        if column in df and isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype(df[column].cat.categories.dtype)
+    if "Index" in df and pd.api.types.is_integer_dtype(df["Index"]):
+        df["Index"] = ["0x%X" % value for value in df["Index"].tolist()]
+    if "ip" in df and df["ip"].dtype == "UInt32":
+        df["ip"] = unpack_ipv4(df["ip"])
+    if "pid" in df and df["pid"].dtype == "Int32":
+        df["pid"] = df["pid"].astype(np.float64 if df["pid"].hasnans else np.int64)
+    return df
@@ -0,0 +1,284 @@
+"""Sliding time-window rules, evaluated in one pass over a timeline sorted by Timestamp.
+
+State is kept per group (user or file) and only covers the window:
+
+- `WindowSequenceRule` keeps, per user, the last matching first event of
+  every key (its path with `same_path`, else a single key) in an ordered
+  dict that doubles as a monotonic queue: entries are appended in time
+  order and expire from the front.
+- `WindowDistinctRule` counts distinct values exactly (value -> last seen,
+  again in time order) up to `exact_limit` values, then switches the group
+  to a sliding HyperLogLog whose registers are monotonic deques of
+  (timestamp, rank), so memory stays bounded however busy the group gets.
+
+Groups whose window has fully expired are dropped every `SWEEP_ROWS` rows.
+"""
+
+import functools
+import hashlib
+import math
+from collections import OrderedDict, deque
+
+import numpy as np
+import pandas as pd
+
+SWEEP_ROWS = 1 << 16            # rows between sweeps of expired groups
+DEFAULT_EXACT_LIMIT = 64        # distinct values counted exactly before switching to HyperLogLog
+DEFAULT_PRECISION = 10          # HyperLogLog registers = 2**precision (about 3% error)
+
+
+# ----- Rule definitions -----
+class WindowSequenceRule:
+    """A `first` event followed, within `within` seconds, by the same user's `then` event.
+
+    Unlike `SequenceRule`, other events may come in between. `first_path` /
+    `then_path` are substrings one of which the event's path must contain;
+    `same_path` requires both events to touch the same path.
+    Description fields: {user}, {path}, {next_path}, {file}, {time}, {within}.
+    """
+    kind = "window_sequence"
+
+    def __init__(self, rule_id, first, then, description, within, first_path=(), then_path=(),
+                 same_path=False, by="user"):
+        self.rule_id = rule_id
+        self.first = first
+        self.then = then
+        self.description = description
+        self.within = within
+        self.first_path = tuple(first_path)
+        self.then_path = tuple(then_path)
+        self.same_path = same_path
+        self.by = by
+
+
+class WindowDistinctRule:
+    """At least `threshold` distinct `field` values of `event` events within `within` seconds, per `by` group.
+
+    Reported once each time a group reaches the threshold (again after it
+    dropped below). `by=None` treats the whole timeline as one group.
+    Description fields: {count}, {group}, {user}, {file}, {time}, {within}.
+    """
+    kind = "window_distinct"
+
+    def __init__(self, rule_id, event, field, threshold, within, description, by="File",
+                 exact_limit=DEFAULT_EXACT_LIMIT, precision=DEFAULT_PRECISION):
+        self.rule_id = rule_id
+        self.event = event
+        self.field = field
+        self.threshold = threshold
+        self.within = within
+        self.description = description
+        self.by = by
+        self.exact_limit = exact_limit
+        self.precision = precision
+
+
+# ----- Distinct counters -----
+@functools.lru_cache(maxsize=1 << 16)
+def _hash64(value):
+    # stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class SlidingHyperLogLog:
+    """HyperLogLog over the values seen in the last `within` seconds.
+
+    Every register keeps the ranks that can still become its maximum as the
+    window slides: a deque of (timestamp, rank) with ranks decreasing from
+    front to back, so the front is the register's current value.
+    """
+
+    def __init__(self, precision=DEFAULT_PRECISION):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = {}
+        self.fronts = np.full(self.m, np.inf)       # timestamp of every register's front entry
+        self.ranks = np.zeros(self.m)               # current value of every register
+        self.alpha = 0.7213 / (1 + 1.079 / self.m)
+
+    def add(self, value, ts):
+        h = _hash64(value)
+        register = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - rest.bit_length() + 1
+        entries = self.registers.get(register)
+        if entries is None:
+            entries = self.registers[register] = deque()
+        while entries and entries[-1][1] <= rank:
+            entries.pop()
+        entries.append((ts, rank))
+        self.fronts[register], self.ranks[register] = entries[0]
+
+    def expire(self, cutoff):
+        """Forget everything seen before `cutoff`."""
+        for register in np.flatnonzero(self.fronts < cutoff).tolist():
+            entries = self.registers[register]
+            while entries and entries[0][0] < cutoff:
+                entries.popleft()
+            if entries:
+                self.fronts[register], self.ranks[register] = entries[0]
+            else:
+                del self.registers[register]
+                self.fronts[register], self.ranks[register] = np.inf, 0
+
+    def count(self):
+        estimate = self.alpha * self.m * self.m / np.exp2(-self.ranks).sum()
+        zeros = self.m - len(self.registers)
+        if estimate <= 2.5 * self.m and zeros:
+            return self.m * math.log(self.m / zeros)     # linear counting for small sets
+        return estimate
+
+
+class _DistinctWindow:
+    """Distinct values of one group within the window: exact while small, then HyperLogLog."""
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.seen = OrderedDict()       # value -> last timestamp, oldest first
+        self.sketch = None
+        self.last_ts = None
+        self.alerted = False
+
+    def add(self, value, ts):
+        """Add one value seen at `ts` and return the distinct count of the window ending there."""
+        cutoff = ts - self.rule.within
+        self.last_ts = ts
+        if self.sketch is not None:
+            self.sketch.add(value, ts)
+            self.sketch.expire(cutoff)
+            return round(self.sketch.count())
+        self.seen.pop(value, None)
+        self.seen[value] = ts
+        while next(iter(self.seen.values())) < cutoff:
+            self.seen.popitem(last=False)
+        if len(self.seen) > self.rule.exact_limit:
+            self.sketch = SlidingHyperLogLog(self.rule.precision)
+            for seen_value, seen_ts in self.seen.items():
+                self.sketch.add(seen_value, seen_ts)
+            self.seen = None
+            return round(self.sketch.count())
+        return len(self.seen)
+
+
+# ----- Detection -----
+def _path_match(paths, needles):
+    """Rows whose path contains one of `needles` (all rows when there are none)."""
+    if not needles:
+        return np.ones(len(paths), dtype=bool)
+    codes, uniques = pd.factorize(paths)
+    hit = np.array([any(needle in str(value) for needle in needles) for value in uniques] + [False], dtype=bool)
+    return hit[codes]
+
+
+class WindowDetector:
+    """Runs window rules over rows fed in Timestamp order, keeping state between calls.
+
+    Feed one sorted timeline, or consecutive sorted batches of a growing one.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.state = [{} for _ in self.rules]
+        self.rows_seen = 0
+        self.next_sweep = SWEEP_ROWS
+
+    def run(self, df, descriptions=None):
+        """Anomaly pieces (with `CompiledRules.finish` sort keys) for the rows of `df`.
+
+        `df` is a timeline prepared by `CompiledRules.prepare`.
+        """
+        descriptions = descriptions or {}
+        pieces = []
+        for rank, rule in enumerate(self.rules):
+            template = descriptions.get(rule.rule_id, rule.description)
+            if rule.kind == "window_sequence":
+                hits = self._sequence(rule, self.state[rank], df)
+            else:
+                hits = self._distinct(rule, self.state[rank], df)
+            pieces.append(self._rows(rule, rank, template, hits))
+        self.rows_seen += len(df)
+        if self.rows_seen >= self.next_sweep and len(df):
+            self.sweep(int(df["Timestamp"].iloc[-1]))
+            self.next_sweep = self.rows_seen + SWEEP_ROWS
+        return pieces
+
+    @staticmethod
+    def _sequence(rule, state, df):
+        types = df["ShortType"].to_numpy()
+        groups = df[rule.by].notna().to_numpy()
+        is_first = groups & (types == rule.first) & _path_match(df["path"], rule.first_path)
+        is_then = groups & (types == rule.then) & _path_match(df["path"], rule.then_path)
+        rows = np.flatnonzero(is_first | is_then)
+        columns = [df[column].to_numpy()[rows].tolist() for column in (rule.by, "path", "File", "Timestamp", "user")]
+
+        hits = []
+        for pos, first, then, group, path, file, ts, user in zip(
+            rows.tolist(), is_first[rows].tolist(), is_then[rows].tolist(), *columns
+        ):
+            key = path if rule.same_path else None
+            seen = state.get(group)
+            if seen:
+                # expire on every row, so `first` events alone cannot grow the state
+                cutoff = ts - rule.within
+                while seen and next(iter(seen.values()))[0] < cutoff:
+                    seen.popitem(last=False)
+            if then and seen and key in seen:
+                hits.append((pos, user, seen[key][1], path, file, ts, None, group))
+            if first:
+                if seen is None:
+                    seen = state[group] = OrderedDict()
+                seen.pop(key, None)
+                seen[key] = (ts, path)
+        return hits
+
+    @staticmethod
+    def _distinct(rule, state, df):
+        candidates = (df["ShortType"] == rule.event).to_numpy() & df[rule.field].notna().to_numpy()
+        if rule.by is not None:
+            candidates &= df[rule.by].notna().to_numpy()
+        rows = np.flatnonzero(candidates)
+        values = df[rule.field].to_numpy()[rows].tolist()
+        groups = df[rule.by].to_numpy()[rows].tolist() if rule.by is not None else ["*"] * len(rows)
+        columns = [df[column].to_numpy()[rows].tolist() for column in ("File", "Timestamp", "user")]
+
+        hits = []
+        for pos, value, group, file, ts, user in zip(rows.tolist(), values, groups, *columns):
+            window = state.get(group)
+            if window is None:
+                window = state[group] = _DistinctWindow(rule)
+            count = window.add(value, ts)
+            if count < rule.threshold:
+                window.alerted = False
+            elif not window.alerted:
+                window.alerted = True
+                hits.append((pos, user, None, None, file, ts, count, group))
+        return hits
+
+    @staticmethod
+    def _rows(rule, rank, template, hits):
+        columns = ["pos", "user", "path", "next_path", "file", "time", "count", "group"]
+        hits = pd.DataFrame(hits, columns=columns)
+        users = ["-" if pd.isna(user) else user for user in hits["user"].tolist()]
+        return pd.DataFrame({
+            "Rule": rule.rule_id,
+            "User": users,
+            "Description": [
+                template.format(user=u, path=p, next_path=n, file=f, time=t, count=c, group=g, within=rule.within)
+                for u, p, n, f, t, c, g in zip(users, *(hits[column].tolist() for column in columns[2:]))
+            ],
+            "File": hits["file"].tolist(),
+            "Time": hits["time"].tolist(),
+            "_stage": 3, "_user": 0, "_pos": hits["pos"].to_numpy(dtype=np.int64), "_rule": rank,
+        })
+
+    def sweep(self, now):
+        """Drop the state of groups that saw nothing within their window before `now`."""
+        for rule, state in zip(self.rules, self.state):
+            cutoff = now - rule.within
+            if rule.kind == "window_sequence":
+                expired = [group for group, seen in state.items()
+                           if not seen or next(reversed(seen.values()))[0] < cutoff]
+            else:
+                expired = [group for group, window in state.items() if window.last_ts < cutoff]
+            for group in expired:
+                del state[group]
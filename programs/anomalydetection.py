@@ -1,94 +1,53 @@
+import sys
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from loganalyzer.rules import detect_anomalies
+from loganalyzer.scoring import AnomalyScorer
+from loganalyzer.storage import FORMATS, UPLOAD_TYPES, available_formats, read_table, to_bytes
+
 # ----------- Streamlit UI Setup ------------
 st.set_page_config(page_title="Day 4: Suspicious Activity Detection", layout="wide")
 st.title("🚨 Day 4: Suspicious Activity Detection Engine")
 
-uploaded_file = st.file_uploader("📂 Upload timeline CSV (from Day 3)", type=["csv"])
-
-# ----------- Rule Matching Logic ------------
-def detect_anomalies(df):
-    anomalies = []
-    df['Timestamp'] = df['Timestamp'].astype(int)
-    df = df.sort_values("Timestamp")
-
-    # Rule R3 - Multiple IPs
-    conn_counts = df[df["ShortType"] == "CONN"].groupby("File")["ip"].nunique()
-    for file, count in conn_counts.items():
-        if count >= 5:
-            anomalies.append({
-                "Rule": "R3",
-                "Description": f"{count} distinct IPs contacted in file {file}",
-                "User": "-",
-                "File": file,
-                "Time": "-"
-            })
-
-    for user in df["user"].dropna().unique():
-        user_df = df[df["user"] == user].sort_values("Timestamp")
-
-        for i in range(len(user_df) - 1):
-            curr = user_df.iloc[i]
-            nxt = user_df.iloc[i + 1]
-
-            if curr["ShortType"] == "EXEC" and nxt["ShortType"] == "FILE":
-                if "passwd" in nxt.get("path", ""):
-                    anomalies.append({
-                        "Rule": "R1",
-                        "User": user,
-                        "Description": f"{user} executed then modified passwd.",
-                        "File": curr["File"],
-                        "Time": nxt["Timestamp"]
-                    })
-
-            if curr["ShortType"] == "EXEC" and nxt["ShortType"] == "SHDW":
-                anomalies.append({
-                    "Rule": "R2",
-                    "User": user,
-                    "Description": f"{user} executed then killed a process.",
-                    "File": curr["File"],
-                    "Time": nxt["Timestamp"]
-                })
+uploaded_file = st.file_uploader("📂 Upload timeline file (from Day 3)", type=UPLOAD_TYPES)
 
-            if curr["ShortType"] == "FILE" and nxt["ShortType"] == "DEL":
-                if curr.get("path") == nxt.get("path"):
-                    anomalies.append({
-                        "Rule": "R5",
-                        "User": user,
-                        "Description": f"{user} modified then deleted `{curr['path']}`",
-                        "File": curr["File"],
-                        "Time": nxt["Timestamp"]
-                    })
 
-    # Rule R4 - Deletion of sensitive files
-    sensitive_deletes = df[df["ShortType"] == "DEL"]
-    for _, row in sensitive_deletes.iterrows():
-        if any(s in row.get("path", "") for s in ["/etc/passwd", "/opt/secure.shd"]):
-            anomalies.append({
-                "Rule": "R4",
-                "User": row.get("user", "unknown"),
-                "Description": f"Deleted sensitive file: {row['path']}",
-                "File": row["File"],
-                "Time": row["Timestamp"]
-            })
+@st.cache_resource
+def get_anomaly_scorer():
+    # fitted on the first upload, reused for the next ones
+    return AnomalyScorer()
 
-    return pd.DataFrame(anomalies)
 
 # ----------- Main App Logic ------------
 if uploaded_file:
-    df = pd.read_csv(uploaded_file)
+    # only the columns the rules read
+    df = read_table(uploaded_file, columns=["File", "Timestamp", "ShortType", "user", "path", "ip"])
     st.success("✅ Timeline loaded. Running detection rules...")
 
     anomaly_df = detect_anomalies(df)
+    scoring = st.checkbox("📈 Add statistical scoring (z-score / Isolation Forest on 10 s windows)")
+    if scoring:
+        anomaly_df = pd.concat([anomaly_df, get_anomaly_scorer().score(df)], ignore_index=True)
 
     st.subheader("🚩 Detected Anomalies")
     if anomaly_df.empty:
         st.success("🎉 No anomalies detected based on current rules.")
     else:
         st.dataframe(anomaly_df, use_container_width=True)
-        csv = anomaly_df.to_csv(index=False).encode()
-        st.download_button("📥 Download Anomaly Report", data=csv, file_name="anomaly_report.csv", mime="text/csv")
+        export_format = st.selectbox("Export format", available_formats())
+        extension, mime = FORMATS[export_format]
+        # written only when asked for; reruns reuse it until the upload or the options change
+        export_key = (uploaded_file.file_id, scoring, export_format)
+        if st.button(f"Prepare {export_format} report"):
+            st.session_state["day4_export"] = (export_key, to_bytes(anomaly_df, export_format))
+        prepared = st.session_state.get("day4_export")
+        if prepared is not None and prepared[0] == export_key:
+            st.download_button("📥 Download Anomaly Report", data=prepared[1],
+                               file_name=f"anomaly_report.{extension}", mime=mime)
 
     st.markdown("---")
     with st.expander("📘 Detection Rules Used", expanded=False):
@@ -98,7 +57,10 @@ if uploaded_file:
         - **R3:** ≥5 unique IP connections in a single file  
         - **R4:** Deletion of `/etc/passwd` or `/opt/secure.shd`  
         - **R5:** Modification and deletion of the same file  
+        - **W1:** ≥5 distinct IP connections within 60 seconds in a file  
+        - **W2:** Execution followed by `/etc/passwd` modification within 10 seconds  
+        - **ZSCORE / IFOREST:** 10-second windows per user and file whose event counts stand out  
         """)
 
 else:
-    st.info("📂 Please upload the `log_timeline.csv` file to begin anomaly analysis.")
+    st.info("📂 Please upload the `log_timeline` file (Parquet, Feather or CSV) to begin anomaly analysis.")
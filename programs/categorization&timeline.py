@@ -1,28 +1,25 @@
+import sys
+from pathlib import Path
+
 import streamlit as st
-import pandas as pd
-import json
-from io import BytesIO
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from loganalyzer.categorize import categorize
+from loganalyzer.export import spooled, table_chunks
+from loganalyzer.storage import FORMATS, UPLOAD_TYPES, available_formats, read_table, to_bytes
+from loganalyzer.timeline import expand
 
 # Set up page
 st.set_page_config(page_title="Day 3: Categorization & Timeline", layout="wide")
 st.title("📆 Day 3: Log Categorization & Timeline Generator")
 
-uploaded_file = st.file_uploader("📂 Upload parsed log CSV file (from Day 2)", type=["csv"])
+uploaded_file = st.file_uploader("📂 Upload parsed log file (from Day 2)", type=UPLOAD_TYPES)
 
 if uploaded_file:
-    df = pd.read_csv(uploaded_file)
+    df = read_table(uploaded_file)
 
     # Map ShortType to Category
-    CATEGORY_MAP = {
-        "EXEC": "User Activity",
-        "DEL": "User Activity",
-        "FILE": "User Activity",
-        "LOG": "User Activity",
-        "SHDW": "Process Control",
-        "CONN": "Network Activity"
-    }
-
-    df["Category"] = df["ShortType"].map(CATEGORY_MAP).fillna("Unknown")
+    df = categorize(df)
 
     # Sort by timestamp for timeline
     df_timeline = df.sort_values("Timestamp")
@@ -40,17 +37,32 @@ if uploaded_file:
     filtered_df = df_timeline[df_timeline["Category"].isin(selected_category)]
 
     st.subheader("🕒 Event Timeline (Chronological)")
-    st.dataframe(filtered_df, use_container_width=True)
+    st.dataframe(expand(filtered_df), use_container_width=True)
 
     # Export Buttons
     st.subheader("📤 Export Timeline")
-    csv_data = filtered_df.to_csv(index=False).encode()
-    st.download_button("📥 Download CSV", csv_data, file_name="log_timeline.csv", mime="text/csv")
+    # exports are written only when asked for; reruns reuse them until the upload or the options change
+    export_format = st.selectbox("Export format", available_formats())
+    extension, mime = FORMATS[export_format]
+    export_key = (uploaded_file.file_id, tuple(selected_category), export_format)
+    if st.button(f"Prepare {export_format} export"):
+        st.session_state["day3_export"] = (export_key, to_bytes(filtered_df, export_format))
+    prepared = st.session_state.get("day3_export")
+    if prepared is not None and prepared[0] == export_key:
+        st.download_button(f"📥 Download {export_format}", prepared[1],
+                           file_name=f"log_timeline.{extension}", mime=mime)
 
-    # Convert to JSON for export
-    json_data = filtered_df.to_dict(orient="records")
-    json_bytes = BytesIO(json.dumps(json_data, indent=2).encode("utf-8"))
-    st.download_button("📥 Download JSON", json_bytes, file_name="log_timeline.json", mime="application/json")
+    # JSON is streamed in chunks into a spooled temp file
+    json_lines = st.checkbox("JSON Lines (one event per line)")
+    extension = "jsonl" if json_lines else "json"
+    json_key = (uploaded_file.file_id, tuple(selected_category), extension)
+    if st.button("Prepare JSON export"):
+        with spooled(table_chunks(filtered_df, extension)) as json_file:
+            st.session_state["day3_json"] = (json_key, json_file.read())
+    prepared = st.session_state.get("day3_json")
+    if prepared is not None and prepared[0] == json_key:
+        st.download_button("📥 Download JSON", prepared[1], file_name=f"log_timeline.{extension}",
+                           mime="application/json")
 
 else:
-    st.info("👆 Upload a `.csv` file generated from Day 2 to generate timeline and categories.")
+    st.info("👆 Upload a `.parquet`, `.feather` or `.csv` file generated from Day 2 to generate timeline and categories.")
@@ -1,8 +1,23 @@
+import sys
+from pathlib import Path
+
 import streamlit as st
-import re
 from collections import defaultdict
 import pandas as pd
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from loganalyzer.parser import iter_log_frames
+from loganalyzer.timeline import compact, expand
+
+
+def day1_columns(df):
+    """The columns this page has always shown and exported: raw `Payload` and `Timestamp` text."""
+    df = expand(df).rename(columns={"PayloadRaw": "Payload"})
+    if "Timestamp" in df:
+        df["Timestamp"] = df["Timestamp"].astype(str)
+    return df
+
+
 st.set_page_config(page_title="Forensic Log Parser", layout="wide")
 st.title("🔍 Forensic Artifact Parser and Analyzer")
 
@@ -11,53 +26,51 @@ uploaded_files = st.file_uploader(
 )
 
 if uploaded_files:
-    event_summary = defaultdict(list)
-    all_entries = []
+    event_counts = defaultdict(int)
+    event_samples = defaultdict(list)
+    all_frames = []
 
     for uploaded_file in uploaded_files:
-        content = uploaded_file.read().decode("utf-8")
-        log_lines = content.strip().splitlines()
-
-        for line in log_lines:
-            match = re.match(r"(0x[0-9A-F]+)\[ts:(\d+)\]\|EVNT:(\S+)!@(.+)", line)
-            if match:
-                idx, timestamp, event_type, payload = match.groups()
-                event_type_base = event_type.split("-")[-1]
-                parsed_entry = {
-                    "File": uploaded_file.name,
-                    "Index": idx,
-                    "Timestamp": timestamp,
-                    "EventType": event_type,
-                    "Payload": payload,
-                    "ShortType": event_type_base
-                }
-                event_summary[event_type_base].append(parsed_entry)
-                all_entries.append(parsed_entry)
+        for frame, _ in iter_log_frames(uploaded_file, uploaded_file.name):
+            if frame.empty:
+                continue
+            for event_type_base, count in frame["ShortType"].value_counts(sort=False).items():
+                event_counts[event_type_base] += count
+            for entry in frame.groupby("ShortType", sort=False).head(5).to_dict(orient="records"):
+                if len(event_samples[entry["ShortType"]]) < 5:
+                    event_samples[entry["ShortType"]].append(entry)
+            all_frames.append(compact(frame[["File", "Index", "Timestamp", "EventType", "PayloadRaw", "ShortType"]]))
 
     st.success(f"✅ {len(uploaded_files)} file(s) parsed successfully!")
 
     # Display summary
     st.header("📊 Event Summary")
-    for event_type, entries in event_summary.items():
-        with st.expander(f"Event Type: `{event_type}` ({len(entries)} entries)", expanded=False):
+    for event_type, count in event_counts.items():
+        with st.expander(f"Event Type: `{event_type}` ({count} entries)", expanded=False):
             st.write("Sample Payloads:")
-            for entry in entries[:5]:
-                st.code(f"{entry['File']} [{entry['Timestamp']}] {entry['Payload']}", language='text')
+            for entry in event_samples[event_type]:
+                st.code(f"{entry['File']} [{entry['Timestamp']}] {entry['PayloadRaw']}", language='text')
+
+    df = compact(pd.concat(all_frames, ignore_index=True)) if all_frames else pd.DataFrame()
 
     if st.checkbox("Show full parsed data"):
         st.subheader("🧾 Full Parsed Entries")
-        st.dataframe(pd.DataFrame(all_entries))
+        st.dataframe(day1_columns(df))
 
     # Export option
     st.header("📤 Export Merged Data")
-    df = pd.DataFrame(all_entries)
-    csv = df.to_csv(index=False).encode("utf-8")
-    st.download_button(
-        label="Download Merged Data as CSV",
-        data=csv,
-        file_name="merged_parsed_logs.csv",
-        mime="text/csv"
-    )
+    # written only when asked for; reruns reuse it until the uploads change
+    export_key = tuple(uploaded_file.file_id for uploaded_file in uploaded_files)
+    if st.button("Prepare CSV export"):
+        st.session_state["day1_export"] = (export_key, day1_columns(df).to_csv(index=False).encode("utf-8"))
+    prepared = st.session_state.get("day1_export")
+    if prepared is not None and prepared[0] == export_key:
+        st.download_button(
+            label="Download Merged Data as CSV",
+            data=prepared[1],
+            file_name="merged_parsed_logs.csv",
+            mime="text/csv"
+        )
 
 else:
     st.info("📂 Please upload one or more `.vlog` files to begin analysis.")
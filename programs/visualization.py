@@ -1,19 +1,37 @@
+import sys
+import zipfile
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 from io import BytesIO
-import plotly.io as pio
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from loganalyzer.aggregate import TimelineAggregates
+from loganalyzer.plotexport import PLOT_FORMATS, PlotExporter
+from loganalyzer.storage import UPLOAD_TYPES, read_table
 
 st.set_page_config(page_title="Day 5: Forensic Log Visualization", layout="wide")
 st.title("📈 Day 5: Visualization Dashboard")
 
+
+@st.cache_resource
+def get_plot_exporter():
+    # rendered chart bytes, shared by every rerun and session
+    return PlotExporter()
+
+
+plot_exporter = get_plot_exporter()
+
 # File upload
-timeline_file = st.file_uploader("📂 Upload timeline CSV file", type=["csv"])
-anomaly_file = st.file_uploader("🚨 Upload anomaly report CSV file", type=["csv"])
+timeline_file = st.file_uploader("📂 Upload timeline file", type=UPLOAD_TYPES)
+anomaly_file = st.file_uploader("🚨 Upload anomaly report file", type=UPLOAD_TYPES)
 
 if timeline_file and anomaly_file:
-    df = pd.read_csv(timeline_file)
-    anomalies = pd.read_csv(anomaly_file)
+    # only the columns the charts use
+    df = read_table(timeline_file, columns=["Timestamp", "ShortType", "user"])
+    anomalies = read_table(anomaly_file, columns=["Time", "User", "Rule", "Description"])
 
     df["Timestamp"] = pd.to_numeric(df["Timestamp"], errors="coerce")
     df = df.sort_values("Timestamp")
@@ -21,18 +39,34 @@ if timeline_file and anomaly_file:
     anomalies["Timestamp"] = pd.to_numeric(anomalies["Time"], errors="coerce")
     anomalies = anomalies.dropna(subset=["Timestamp"])
 
+    # Charts 1-2 are drawn from per-bucket counts and a bounded sample
+    df = df.dropna(subset=["Timestamp"])
+    aggregates = TimelineAggregates(df)
+    t_min, t_max = aggregates.span or (0, 0)
+    if t_min < t_max:
+        t_start, t_end = st.slider("🔍 Time range", t_min, t_max, (t_min, t_max))
+    else:
+        t_start, t_end = t_min, t_max
+
     # Chart 1: Event frequency
     st.subheader("📊 Event Frequency Over Time")
-    freq_fig = px.histogram(df, x="Timestamp", color="ShortType", nbins=30,
-                            title="Event Frequency", labels={"Timestamp": "Time", "ShortType": "Type"})
+    freq_counts, bucket = aggregates.counts("ShortType", t_start, t_end)
+    freq_fig = px.bar(freq_counts, x="Time", y="Count", color="ShortType",
+                      title=f"Event Frequency ({bucket}s buckets)", labels={"ShortType": "Type"})
+    freq_fig.update_traces(width=bucket, offset=0)
+    freq_fig.update_layout(bargap=0)
     st.plotly_chart(freq_fig, use_container_width=True)
 
     # Chart 2: User Activity
     st.subheader("👤 User Activity Timeline")
-    user_df = df.dropna(subset=["user"])
-    user_fig = px.strip(user_df, x="Timestamp", y="user", color="ShortType",
-                        title="User Actions Over Time", stripmode="overlay")
-    st.plotly_chart(user_fig, use_container_width=True)
+    user_df = aggregates.strip_sample(t_start, t_end)
+    user_fig = None
+    if user_df.empty:
+        st.info("No user events in this time range.")
+    else:
+        user_fig = px.strip(user_df, x="Timestamp", y="user", color="ShortType", hover_data=["Events"],
+                            title="User Actions Over Time", stripmode="overlay")
+        st.plotly_chart(user_fig, use_container_width=True)
 
     # Chart 3: Anomalies
     st.subheader("🚨 Highlighted Anomalies")
@@ -42,15 +76,30 @@ if timeline_file and anomaly_file:
 
     # Exports
     st.subheader("📥 Download Charts")
+    figures = {"event_frequency": freq_fig, "user_activity": user_fig, "anomaly_plot": anomaly_fig}
+    figures = {name: fig for name, fig in figures.items() if fig is not None}
+
     def download_plot(fig, name):
-        img_bytes = fig.to_image(format="png", width=1000, height=600, scale=2)
-        html_bytes = fig.to_html(full_html=False).encode("utf-8")
-        st.download_button(f"⬇️ Download {name} (PNG)", img_bytes, file_name=f"{name}.png", mime="image/png")
-        st.download_button(f"⬇️ Download {name} (HTML)", html_bytes, file_name=f"{name}.html", mime="text/html")
+        # nothing is rendered until asked for; later reruns reuse the cached bytes
+        if st.button(f"🖼️ Prepare {name} downloads", key=f"prepare_{name}"):
+            st.session_state[f"prepared_{name}"] = True
+        if not st.session_state.get(f"prepared_{name}"):
+            return
+        renders = {fmt: plot_exporter.submit(fig, fmt, scale=2) for fmt in PLOT_FORMATS}
+        for fmt, mime in PLOT_FORMATS.items():
+            st.download_button(f"⬇️ Download {name} ({fmt.upper()})", renders[fmt].result(),
+                               file_name=f"{name}.{fmt}", mime=mime)
+
+    for name, fig in figures.items():
+        download_plot(fig, name)
 
-    download_plot(freq_fig, "event_frequency")
-    download_plot(user_fig, "user_activity")
-    download_plot(anomaly_fig, "anomaly_plot")
+    if st.button("📦 Prepare all charts (ZIP)"):
+        # every chart and format is rendered concurrently
+        zip_buffer = BytesIO()
+        with zipfile.ZipFile(zip_buffer, "w") as zipf:
+            plot_exporter.write_zip(zipf, figures, folder="", scale=2)
+        st.download_button("⬇️ Download all charts (ZIP)", zip_buffer.getvalue(), file_name="charts.zip",
+                           mime="application/zip")
 
 else:
-    st.info("📂 Please upload both the timeline CSV and anomaly report CSV to generate visualizations.")
+    st.info("📂 Please upload both the timeline and the anomaly report (Parquet, Feather or CSV) to generate visualizations.")
@@ -0,0 +1,64 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from loganalyzer.follow import LogFollower
+from loganalyzer.parser import parse_log_file
+from loganalyzer.timeline import compact, expand
+
+SAMPLE_LOGS = sorted((Path(__file__).resolve().parents[1] / "sample log").glob("*.vlog"))
+
+
+def write(path, text):
+    with open(path, "ab") as f:
+        f.write(text.encode())
+
+
+def test_sequence_across_polls_is_detected(tmp_path):
+    log = tmp_path / "live.vlog"
+    write(log, "0x0[ts:100]|EVNT:XR-EXEC!@RUN_usr:eve=>/usr/bin/vi\n")
+    follower = LogFollower(tmp_path, rules=("R1",))
+    rows, found = follower.poll()
+    assert len(rows) == 1 and found.empty
+
+    write(log, "0x1[ts:105]|EVNT:XR-FILE!@MOD_usr:eve=>/etc/passwd\n")
+    rows, found = follower.poll()
+    assert len(rows) == 1
+    assert found["Rule"].tolist() == ["R1"] and found["User"].tolist() == ["eve"]
+    assert follower.anomalies["Rule"].tolist() == ["R1"]
+    assert follower.timeline["Index"].tolist() == [0, 1]
+
+
+def test_partial_trailing_line_waits_for_its_end(tmp_path):
+    log = tmp_path / "live.vlog"
+    write(log, "0x0[ts:100]|EVNT:XR-CONN!@IP:10.0.0.1\n0x1[ts:101]|EVNT:XR-CO")
+    follower = LogFollower(tmp_path)
+    rows, _ = follower.poll()
+    assert rows["Index"].tolist() == ["0x0"]
+    assert follower.poll()[0].empty
+
+    write(log, "NN!@IP:10.0.0.2\r")
+    assert follower.poll()[0].empty     # "\r" may still be the start of "\r\n"
+    write(log, "\n0x2[ts:102]|EVNT:XR-CONN!@IP:10.0.0.3\n")
+    rows, _ = follower.poll()
+    assert rows["Index"].tolist() == ["0x1", "0x2"]
+    assert rows["ip"].tolist() == ["10.0.0.2", "10.0.0.3"]
+    assert len(follower.error_lines) == 0 and follower.files["live.vlog"].lines == 3
+
+
+def test_followed_files_match_a_full_parse(tmp_path):
+    # small chunks and many polls: lines are cut at every possible place
+    follower = LogFollower(tmp_path, chunk_size=97)
+    expected = []
+    for source in SAMPLE_LOGS:
+        content = source.read_bytes()
+        expected.append(parse_log_file(source.open("rb"), source.name)[0])
+        for start in range(0, len(content), 1500):
+            with open(tmp_path / source.name, "ab") as f:
+                f.write(content[start:start + 1500])
+            follower.poll()
+    full = compact(pd.concat(expected, ignore_index=True)).sort_values("Timestamp", kind="stable")
+    timeline = expand(follower.timeline)[full.columns].reset_index(drop=True)
+    pd.testing.assert_frame_equal(timeline, expand(full).reset_index(drop=True))
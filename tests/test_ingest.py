@@ -0,0 +1,38 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from loganalyzer.ingest import ingest
+from loganalyzer.parser import DEFAULT_ERROR_LIMIT
+
+SAMPLE_LOGS = sorted((Path(__file__).resolve().parents[1] / "sample log").glob("*.vlog"))
+
+
+@pytest.fixture(scope="module")
+def sequential():
+    return ingest(SAMPLE_LOGS, workers=1)
+
+
+@pytest.mark.parametrize("workers", [2, 3, 8])
+@pytest.mark.parametrize("shard_size", [512, 4096, 1 << 20])
+def test_parallel_ingest_matches_sequential(sequential, workers, shard_size):
+    df, summary_stats, error_lines = ingest(SAMPLE_LOGS, workers=workers, shard_size=shard_size)
+    expected_df, expected_stats, expected_errors = sequential
+    pd.testing.assert_frame_equal(df, expected_df)
+    assert summary_stats == expected_stats
+    assert list(error_lines) == list(expected_errors) and error_lines.counts == expected_errors.counts
+
+
+def test_error_records_are_capped_per_file(tmp_path):
+    paths = []
+    for name in ("a.vlog", "b.vlog"):
+        path = tmp_path / name
+        path.write_text("not a log line\n" * (DEFAULT_ERROR_LIMIT + 10), encoding="utf-8")
+        paths.append(path)
+    _, _, error_lines = ingest(paths, workers=2, shard_size=4096)
+    files = pd.DataFrame(error_lines)["File"].value_counts()
+    assert files.to_dict() == {"a.vlog": DEFAULT_ERROR_LIMIT, "b.vlog": DEFAULT_ERROR_LIMIT}
+    assert error_lines.total == 2 * (DEFAULT_ERROR_LIMIT + 10)
@@ -0,0 +1,111 @@
+import io
+import re
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from loganalyzer.parser import MIN_COLUMNAR_LINES, iter_lines, parse_log_file, parse_log_lines
+
+SAMPLE_LOGS = sorted((Path(__file__).resolve().parents[1] / "sample log").glob("*.vlog"))
+
+# every line terminator `str.splitlines` knows about
+LINE_BREAKS = ["\n", "\r\n", "\r", "\x0b", "\x0c", "\x1c", "\x1d", "\x1e", "\x85", "\u2028", "\u2029"]
+
+
+# ----- The original Day 2 parser (programs/log parsing.py) -----
+class BaselineLogEntry:
+    def __init__(self, index, timestamp, event_type, payload_raw, file_source="unknown"):
+        self.index = index
+        self.timestamp = int(timestamp)
+        self.event_type = event_type
+        self.payload_raw = payload_raw
+        self.short_type = event_type.split("-")[-1]
+        self.payload_data = self._parse_payload(payload_raw)
+        self.source_file = file_source
+
+    def _parse_payload(self, payload):
+        try:
+            if self.short_type == "CONN":
+                return {"ip": payload.split(":")[1]}
+            elif self.short_type == "SHDW":
+                return {"pid": int(payload.split(":")[1].replace("pid", ""))}
+            else:
+                user, path = payload.split("=>")
+                return {
+                    "user": user.split(":")[1],
+                    "path": path
+                }
+        except Exception:
+            return {"error": "Malformed payload"}
+
+    def to_dict(self):
+        return {
+            "File": self.source_file,
+            "Index": self.index,
+            "Timestamp": self.timestamp,
+            "EventType": self.event_type,
+            "ShortType": self.short_type,
+            "PayloadRaw": self.payload_raw,
+            **self.payload_data
+        }
+
+
+def baseline_parse_log_lines(lines, filename):
+    parsed_entries = []
+    error_lines = []
+
+    for i, line in enumerate(lines, 1):
+        line = line.strip()
+        match = re.match(r"(0x[0-9A-F]+)\[ts:(\d+)\]\|EVNT:(\S+)!@(.+)", line)
+        if match:
+            idx, ts, event, payload = match.groups()
+            parsed_entries.append(BaselineLogEntry(idx, ts, event, payload, file_source=filename).to_dict())
+        else:
+            error_lines.append({"File": filename, "LineNumber": i, "Line": line})
+
+    return parsed_entries, error_lines
+
+
+def mixed_line_breaks(text):
+    """`text` with its lines joined by every terminator in turn."""
+    lines = text.split("\n")
+    return "".join(line + LINE_BREAKS[i % len(LINE_BREAKS)] for i, line in enumerate(lines))
+
+
+def assert_matches_baseline(content, chunk_size):
+    expected, expected_errors = baseline_parse_log_lines(content.decode("utf-8").splitlines(), "f.vlog")
+    df, errors = parse_log_file(io.BytesIO(content), "f.vlog", chunk_size=chunk_size)
+    pd.testing.assert_frame_equal(df, pd.DataFrame(expected), check_dtype=False)
+    assert [(e["LineNumber"], e["Line"]) for e in errors] == \
+        [(e["LineNumber"], e["Line"]) for e in expected_errors]
+
+    entries, line_errors = parse_log_lines(iter_lines(io.BytesIO(content), chunk_size), "f.vlog")
+    assert entries == expected
+    assert [(e["LineNumber"], e["Line"]) for e in line_errors] == \
+        [(e["LineNumber"], e["Line"]) for e in expected_errors]
+
+
+def sample_text(copies):
+    """Every sample log (corrupt.vlog included), `copies` times over."""
+    text = "\n".join(path.read_text(encoding="utf-8") for path in SAMPLE_LOGS)
+    return "\n".join([text] * copies)
+
+
+@pytest.mark.parametrize("chunk_size", [5, 64, 4096, 1 << 22])
+def test_mixed_line_breaks_match_baseline(chunk_size):
+    content = mixed_line_breaks(SAMPLE_LOGS[0].read_text(encoding="utf-8")).encode("utf-8")
+    assert_matches_baseline(content, chunk_size)
+
+
+@pytest.mark.parametrize("chunk_size", [4096, 1 << 22])
+@pytest.mark.parametrize("mixed", [False, True])
+def test_columnar_blocks_match_baseline(chunk_size, mixed):
+    # enough lines that the large chunk size parses them as one columnar block
+    text = sample_text(copies=4)
+    assert text.count("\n") > MIN_COLUMNAR_LINES
+    if mixed:
+        text = mixed_line_breaks(text)
+    assert_matches_baseline(text.encode("utf-8"), chunk_size)
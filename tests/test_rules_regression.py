@@ -0,0 +1,114 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from loganalyzer.parser import parse_log_file
+from loganalyzer.rules import detect_anomalies, rules_from_spec
+
+SAMPLE_LOGS = sorted((Path(__file__).resolve().parents[1] / "sample log").glob("*.vlog"))
+
+
+def baseline_detect_anomalies(df):
+    """The per-user loop of the original Day 4 page (programs/anomalydetection.py)."""
+    anomalies = []
+    df['Timestamp'] = df['Timestamp'].astype(int)
+    df = df.sort_values("Timestamp")
+
+    # Rule R3 - Multiple IPs
+    conn_counts = df[df["ShortType"] == "CONN"].groupby("File")["ip"].nunique()
+    for file, count in conn_counts.items():
+        if count >= 5:
+            anomalies.append({
+                "Rule": "R3",
+                "Description": f"{count} distinct IPs contacted in file {file}",
+                "User": "-",
+                "File": file,
+                "Time": "-"
+            })
+
+    for user in df["user"].dropna().unique():
+        user_df = df[df["user"] == user].sort_values("Timestamp")
+
+        for i in range(len(user_df) - 1):
+            curr = user_df.iloc[i]
+            nxt = user_df.iloc[i + 1]
+
+            if curr["ShortType"] == "EXEC" and nxt["ShortType"] == "FILE":
+                if "passwd" in nxt.get("path", ""):
+                    anomalies.append({
+                        "Rule": "R1",
+                        "User": user,
+                        "Description": f"{user} executed then modified passwd.",
+                        "File": curr["File"],
+                        "Time": nxt["Timestamp"]
+                    })
+
+            if curr["ShortType"] == "EXEC" and nxt["ShortType"] == "SHDW":
+                anomalies.append({
+                    "Rule": "R2",
+                    "User": user,
+                    "Description": f"{user} executed then killed a process.",
+                    "File": curr["File"],
+                    "Time": nxt["Timestamp"]
+                })
+
+            if curr["ShortType"] == "FILE" and nxt["ShortType"] == "DEL":
+                if curr.get("path") == nxt.get("path"):
+                    anomalies.append({
+                        "Rule": "R5",
+                        "User": user,
+                        "Description": f"{user} modified then deleted `{curr['path']}`",
+                        "File": curr["File"],
+                        "Time": nxt["Timestamp"]
+                    })
+
+    # Rule R4 - Deletion of sensitive files
+    sensitive_deletes = df[df["ShortType"] == "DEL"]
+    for _, row in sensitive_deletes.iterrows():
+        if any(s in row.get("path", "") for s in ["/etc/passwd", "/opt/secure.shd"]):
+            anomalies.append({
+                "Rule": "R4",
+                "User": row.get("user", "unknown"),
+                "Description": f"Deleted sensitive file: {row['path']}",
+                "File": row["File"],
+                "Time": row["Timestamp"]
+            })
+
+    return pd.DataFrame(anomalies)
+
+
+@pytest.fixture(scope="module")
+def sample_timeline():
+    frames = []
+    for path in SAMPLE_LOGS:
+        with open(path, "rb") as f:
+            frames.append(parse_log_file(f, path.name)[0])
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_rules_match_baseline_on_sample_logs(sample_timeline):
+    expected = baseline_detect_anomalies(sample_timeline.copy())
+    actual = detect_anomalies(sample_timeline.copy(), rules=("R1", "R2", "R3", "R4", "R5"))
+
+    assert len(expected) > 0
+    columns = ["Rule", "User", "Description", "File", "Time"]
+    assert actual[columns].astype(str).values.tolist() == expected[columns].astype(str).values.tolist()
+
+
+def test_custom_ruleset_runs_all_its_rules_by_default(sample_timeline):
+    ruleset = rules_from_spec([
+        {"type": "event", "id": "X1", "event": "DEL", "description": "{user} deleted {path}"},
+    ])
+    default = detect_anomalies(sample_timeline.copy(), ruleset=ruleset)
+    selected = detect_anomalies(sample_timeline.copy(), rules=("X1",), ruleset=ruleset)
+
+    assert len(default) > 0
+    assert default.equals(selected)
+
+
+def test_unknown_rule_type_names_the_rule():
+    with pytest.raises(ValueError, match="'X2'.*'sequnce'.*sequence"):
+        rules_from_spec([{"type": "sequnce", "id": "X2", "first": "EXEC", "then": "FILE", "description": ""}])